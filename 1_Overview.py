@@ -1,46 +1,54 @@
 import streamlit as st
+import pandas as pd
 import plotly.express as px
 
 from helpers_styling import inject_global_css
-from helpers_data import get_data_path, load_data, apply_filters
-from helpers_modeling import train_model, predict_batch, risk_level
+from helpers_data import get_data_path, load_data, sidebar_filters, apply_filters
+from helpers_modeling import predict_batch, risk_levels
+from helpers_snapshots import get_model_bundle, serve_snapshot
+from helpers_stats import build_moments, select_cells, summarize
 from helpers_kpi import kpi_card
 from helpers_charts import apply_layout
-from helpers_advanced_charts import sankey_customer_journey, sunburst_value_segments, pareto_churn_segments
+from helpers_perf import start_run, finish_run, stage, plotly_chart
+from helpers_advanced_charts import sankey_customer_journey, sunburst_value_segments, pareto_segments
+from helpers_hotspots import HOTSPOT_DIMS, build_cube, segment_table, mine_hotspots
 
 st.set_page_config(page_title="Overview", layout="wide")
 inject_global_css()
+start_run("Overview")
 
 st.title("Overview (Executive)")
 
 df = load_data(get_data_path())
 
-# Filters
-st.sidebar.header("Filters")
-geos = st.sidebar.multiselect("Geography", sorted(df["Geography"].unique().tolist()))
-age_range = st.sidebar.slider("Age Range", int(df["Age"].min()), int(df["Age"].max()), (25, 60))
-products = st.sidebar.multiselect("Num of Products", sorted(df["NumOfProducts"].unique().tolist()))
-active_member = st.sidebar.radio("Active Member", ["All", "Active", "Not Active"], index=0)
+filters = sidebar_filters(df)
+dff = apply_filters(df, **filters)
 
-dff = apply_filters(df, geos, age_range, products, active_member).copy()
+model, scaler, feat_cols, auc, report, explainer = get_model_bundle(df)
 
-# Train model once per session
-if "model_bundle" not in st.session_state:
-    with st.spinner("Training model (first run only)..."):
-        st.session_state["model_bundle"] = train_model(df)
+if serve_snapshot("Overview", filters, report["version"]):
+    finish_run()
+    st.stop()
 
-model, scaler, feat_cols, auc, test_bundle, explainer = st.session_state["model_bundle"]
-
-# Batch predictions (FAST)
-dff["churn_proba"] = predict_batch(model, scaler, feat_cols, dff)
-dff["risk"] = dff["churn_proba"].apply(risk_level)
+# Score the full dataset once per model and keep per-segment moments; KPIs for any filter state merge them
+if st.session_state.get("overview_moments", (None,))[0] != report["version"]:
+    with stage("build KPI moments"):
+        proba_all = pd.Series(predict_batch(model, scaler, feat_cols, df), index=df.index)
+        st.session_state["overview_moments"] = (
+            report["version"],
+            build_moments(df, counts={"HighRisk": proba_all >= 0.70}),
+            proba_all,
+        )
+_, moments, proba_all = st.session_state["overview_moments"]
 
 # KPIs
-total = len(dff)
-churn_rate = float(dff["Exited"].mean()) if total else 0.0
-active_pct = float(dff["IsActiveMember"].mean()) if total else 0.0
-avg_balance = float(dff["Balance"].mean()) if total else 0.0
-high_risk = int((dff["risk"] == "High").sum())
+with stage("KPIs from moments"):
+    kpis = summarize(moments, select_cells(moments, **filters))
+total = kpis["n"]
+churn_rate = float(kpis["mean"]["Exited"]) if total else 0.0
+active_pct = float(kpis["mean"]["IsActiveMember"]) if total else 0.0
+avg_balance = float(kpis["mean"]["Balance"]) if total else 0.0
+high_risk = int(kpis["counts"]["HighRisk"])
 
 c1, c2, c3, c4, c5 = st.columns(5)
 with c1:
@@ -58,10 +66,11 @@ st.divider()
 
 left, right = st.columns(2)
 with left:
-    st.plotly_chart(sankey_customer_journey(dff), use_container_width=True)
+    plotly_chart(sankey_customer_journey(dff), use_container_width=True)
 
 with right:
-    geo = dff.groupby("Geography")["Exited"].mean().reset_index(name="ChurnRate")
+    with stage("groupby: churn by geography"):
+        geo = dff.groupby("Geography")["Exited"].mean().reset_index(name="ChurnRate")
     fig = px.bar(
         geo,
         x="Geography",
@@ -72,7 +81,41 @@ with right:
     )
     fig.update_traces(texttemplate="%{text:.1%}", textposition="outside")
     fig.update_layout(yaxis_tickformat=".0%")
-    st.plotly_chart(apply_layout(fig, "Churn Rate by Geography"), use_container_width=True)
+    plotly_chart(apply_layout(fig, "Churn Rate by Geography"), use_container_width=True)
+
+plotly_chart(sunburst_value_segments(dff), use_container_width=True)
+
+# Churn hotspots across segment combinations
+st.subheader("Churn hotspots (all segment combinations)")
+
+dff = dff.assign(churn_proba=proba_all.loc[dff.index].to_numpy())
+dff["risk"] = risk_levels(dff["churn_proba"])
+with stage("hotspot cube"):
+    cube = build_cube(dff)
+
+h1, h2, h3, h4 = st.columns(4)
+max_depth = h1.slider("Max combination depth", 1, 4, 3)
+min_support = h2.number_input("Min customers per segment", value=50, min_value=1, step=10)
+min_lift = h3.slider("Min churn lift vs overall", 1.0, 3.0, 1.2, 0.1)
+rank_by = h4.selectbox("Rank by", ["churned", "value_at_risk", "lift", "churn_rate"])
+
+with stage("hotspot mining"):
+    hot = mine_hotspots(cube, max_depth=max_depth, min_support=int(min_support), min_lift=min_lift, rank_by=rank_by)
+st.dataframe(
+    hot.head(200).style.format({
+        "churn_rate": "{:.1%}", "lift": "{:.2f}x", "share_of_churn": "{:.1%}",
+        "value_at_risk": "{:,.0f}", "share_of_value_at_risk": "{:.1%}",
+        "customers": "{:,.0f}", "churned": "{:,.0f}",
+    }),
+    use_container_width=True,
+)
+
+p1, p2 = st.columns([3, 1])
+pareto_dims = p1.multiselect(
+    "Pareto segmentation", HOTSPOT_DIMS, default=["Geography", "IsActiveMember", "NumOfProducts"]
+)
+pareto_metric = p2.selectbox("Pareto metric", ["churned", "value_at_risk"])
+if pareto_dims:
+    plotly_chart(pareto_segments(segment_table(cube, tuple(pareto_dims)), pareto_metric), use_container_width=True)
 
-st.plotly_chart(sunburst_value_segments(dff), use_container_width=True)
-st.plotly_chart(pareto_churn_segments(dff), use_container_width=True)
\ No newline at end of file
+finish_run()
\ No newline at end of file
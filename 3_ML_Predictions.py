@@ -4,35 +4,34 @@ import plotly.express as px
 import plotly.graph_objects as go
 
 from helpers_styling import inject_global_css
-from helpers_data import get_data_path, load_data, apply_filters
-from helpers_modeling import train_model, predict_batch, predict_proba, risk_level, one_hot
+from helpers_data import get_data_path, load_data, sidebar_filters, apply_filters
+from helpers_modeling import predict_batch, predict_proba, prepare_features, explain_rows, risk_level, risk_levels
 from helpers_charts import apply_layout
+from helpers_kpi import metric
+from helpers_perf import start_run, finish_run, stage, plotly_chart
+from helpers_snapshots import get_model_bundle, serve_snapshot
 
 st.set_page_config(page_title="ML Predictions", layout="wide")
 inject_global_css()
+start_run("ML Predictions")
 
 st.title("ML Predictions & Explainability (SHAP)")
 
 df = load_data(get_data_path())
 
-# Filters
-st.sidebar.header("Filters")
-geos = st.sidebar.multiselect("Geography", sorted(df["Geography"].unique().tolist()))
-age_range = st.sidebar.slider("Age Range", int(df["Age"].min()), int(df["Age"].max()), (25, 60))
-products = st.sidebar.multiselect("Num of Products", sorted(df["NumOfProducts"].unique().tolist()))
-active_member = st.sidebar.radio("Active Member", ["All", "Active", "Not Active"], index=0)
-dff = apply_filters(df, geos, age_range, products, active_member).copy()
+filters = sidebar_filters(df)
+dff = apply_filters(df, **filters).copy()
 
-# Train model once per session
-if "model_bundle" not in st.session_state:
-    with st.spinner("Training model (first run only)..."):
-        st.session_state["model_bundle"] = train_model(df)
+model, scaler, feat_cols, auc, report, explainer = get_model_bundle(df)
 
-model, scaler, feat_cols, auc, test_bundle, explainer = st.session_state["model_bundle"]
+if serve_snapshot("ML Predictions", filters, report["version"]):
+    finish_run()
+    st.stop()
 
 # Predict
 dff["churn_proba"] = predict_batch(model, scaler, feat_cols, dff)
-dff["risk"] = dff["churn_proba"].apply(risk_level)
+with stage("risk tiers"):
+    dff["risk"] = risk_levels(dff["churn_proba"])
 
 # Probability distribution (violin)
 v = px.violin(
@@ -44,7 +43,7 @@ v = px.violin(
     points="outliers",
     color_discrete_map={0: "#DC3545", 1: "#28A745"},
 )
-st.plotly_chart(apply_layout(v, "Churn Probability Distribution by Geography (Active vs Not)"), use_container_width=True)
+plotly_chart(apply_layout(v, "Churn Probability Distribution by Geography (Active vs Not)"), use_container_width=True)
 
 # 3D scatter (sample to keep it fast)
 sample = dff.sample(min(1500, len(dff)), random_state=1) if len(dff) > 0 else dff
@@ -57,13 +56,14 @@ s3 = px.scatter_3d(
     color_continuous_scale=["#28A745", "#FFA500", "#DC3545"],
     opacity=0.75,
 )
-st.plotly_chart(apply_layout(s3, "3D: Age × Balance × CreditScore (color = churn probability)", height=700), use_container_width=True)
+plotly_chart(apply_layout(s3, "3D: Age × Balance × CreditScore (color = churn probability)", height=700), use_container_width=True)
 
 st.subheader("Explain one customer (SHAP Waterfall)")
 cid_col = "CustomerID" if "CustomerID" in dff.columns else None
 
 if len(dff) == 0:
     st.warning("No data after filters. Adjust filters to see predictions and SHAP explanations.")
+    finish_run()
     st.stop()
 
 if cid_col:
@@ -79,15 +79,11 @@ p = predict_proba(model, scaler, feat_cols, row)
 st.write(f"Predicted churn probability: **{p:.1%}** (Risk: **{risk_level(p)}**)")
 
 # SHAP waterfall (top 10)
-X = one_hot(row)
-for col in feat_cols:
-    if col not in X.columns:
-        X[col] = 0
-X = X[feat_cols]
-Xs = scaler.transform(X)
-
-shap_values = explainer.shap_values(Xs)
-base = float(explainer.expected_value)
+Xs = prepare_features(scaler, feat_cols, row)
+
+with stage("shap_values"):
+    shap_values, base_values = explain_rows(explainer, Xs, row)
+base = float(base_values[0])
 sv = shap_values[0]
 
 order = np.argsort(np.abs(sv))[::-1][:10]
@@ -107,7 +103,7 @@ wf = go.Figure(
         totals={"marker": {"color": "#0066CC"}},
     )
 )
-st.plotly_chart(apply_layout(wf, "SHAP Waterfall (Top 10 drivers)", height=620), use_container_width=True)
+plotly_chart(apply_layout(wf, "SHAP Waterfall (Top 10 drivers)", height=620), use_container_width=True)
 
 st.subheader("What‑if Simulator")
 
@@ -130,4 +126,6 @@ row2.loc[:, "EstimatedSalary"] = salary
 row2.loc[:, "IsActiveMember"] = active
 
 p2 = predict_proba(model, scaler, feat_cols, row2)
-st.metric("New churn probability", f"{p2:.1%}", delta=f"{(p2 - p):+.1%}")
\ No newline at end of file
+metric(st, "New churn probability", f"{p2:.1%}", delta=f"{(p2 - p):+.1%}")
+
+finish_run()
\ No newline at end of file
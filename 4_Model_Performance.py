@@ -1,59 +1,73 @@
 import streamlit as st
-import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 
-from sklearn.metrics import (
-    roc_curve,
-    precision_recall_curve,
-    confusion_matrix,
-    f1_score,
-    precision_score,
-    recall_score,
-)
-
 from helpers_styling import inject_global_css
 from helpers_data import get_data_path, load_data
-from helpers_modeling import train_model
 from helpers_charts import apply_layout
+from helpers_kpi import metric
+from helpers_perf import start_run, finish_run, plotly_chart
+from helpers_snapshots import get_model_bundle, serve_snapshot
+from helpers_evaluation import (
+    FPR_GRID,
+    RECALL_GRID,
+    cached_bootstrap,
+    confidence_band,
+    profit_band,
+)
 
 st.set_page_config(page_title="Model Performance", layout="wide")
 inject_global_css()
+start_run("Model Performance")
 
 st.title("Model Performance (Credibility)")
 
 df = load_data(get_data_path())
 
-if "model_bundle" not in st.session_state:
-    with st.spinner("Training model (first run only)..."):
-        st.session_state["model_bundle"] = train_model(df)
+model, scaler, feat_cols, auc, report, explainer = get_model_bundle(df)
 
-model, scaler, feat_cols, auc, (X_test_s, y_test), explainer = st.session_state["model_bundle"]
+if serve_snapshot("Model Performance", None, report["version"]):
+    finish_run()
+    st.stop()
 
-proba = model.predict_proba(X_test_s)[:, 1]
-pred_default = (proba >= 0.5).astype(int)
+# Everything below renders the evaluation report computed at training time
+boot = cached_bootstrap(report["version"], report["y_true"], report["proba"])
+auc_lo, auc_hi = confidence_band(boot["auc"])
+metric(st, "Holdout AUC", f"{auc:.3f}", delta=f"95% CI {auc_lo:.3f} – {auc_hi:.3f}", delta_color="off")
 
 # Confusion matrix
-cm = confusion_matrix(y_test, pred_default)
+cm = report["confusion"][0.5]
 cm_fig = px.imshow(cm, text_auto=True, aspect="auto", color_continuous_scale=["#E8F5E9", "#DC3545"])
 cm_fig.update_xaxes(title="Predicted", tickvals=[0, 1], ticktext=["Retained", "Churn"])
 cm_fig.update_yaxes(title="Actual", tickvals=[0, 1], ticktext=["Retained", "Churn"])
-st.plotly_chart(apply_layout(cm_fig, "Confusion Matrix (threshold=0.50)", height=520), use_container_width=True)
+plotly_chart(apply_layout(cm_fig, "Confusion Matrix (threshold=0.50)", height=520), use_container_width=True)
 
 # ROC
-fpr, tpr, _ = roc_curve(y_test, proba)
+fpr, tpr = report["roc"]
+tpr_lo, tpr_hi = confidence_band(boot["tpr"])
 roc = go.Figure()
+roc.add_scatter(x=FPR_GRID, y=tpr_hi, mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip")
+roc.add_scatter(
+    x=FPR_GRID, y=tpr_lo, mode="lines", line=dict(width=0), fill="tonexty",
+    fillcolor="rgba(0,102,204,0.2)", name="95% CI",
+)
 roc.add_scatter(x=fpr, y=tpr, mode="lines", line=dict(color="#0066CC", width=5), name=f"ROC (AUC={auc:.3f})")
 roc.add_scatter(x=[0, 1], y=[0, 1], mode="lines", line=dict(color="#4A4A4A", dash="dash"), name="Random")
 roc.update_layout(xaxis_title="False Positive Rate", yaxis_title="True Positive Rate")
-st.plotly_chart(apply_layout(roc, "ROC Curve", height=520), use_container_width=True)
+plotly_chart(apply_layout(roc, "ROC Curve", height=520), use_container_width=True)
 
 # Precision-Recall
-prec, rec, _ = precision_recall_curve(y_test, proba)
+prec, rec = report["pr"]
+prec_lo, prec_hi = confidence_band(boot["precision"])
 pr = go.Figure()
+pr.add_scatter(x=RECALL_GRID, y=prec_hi, mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip")
+pr.add_scatter(
+    x=RECALL_GRID, y=prec_lo, mode="lines", line=dict(width=0), fill="tonexty",
+    fillcolor="rgba(220,53,69,0.2)", name="95% CI",
+)
 pr.add_scatter(x=rec, y=prec, mode="lines", line=dict(color="#DC3545", width=5), name="Precision–Recall")
 pr.update_layout(xaxis_title="Recall", yaxis_title="Precision")
-st.plotly_chart(apply_layout(pr, "Precision–Recall Curve", height=520), use_container_width=True)
+plotly_chart(apply_layout(pr, "Precision–Recall Curve", height=520), use_container_width=True)
 
 # Threshold tuning + profit
 st.subheader("Threshold tuning (including expected profit)")
@@ -63,31 +77,61 @@ value_per_churn = col1.number_input("Value lost if churn happens (proxy)", value
 offer_cost = col2.number_input("Offer cost per targeted customer", value=20.0, min_value=0.0)
 save_rate = col3.slider("Save rate if targeted (effectiveness)", 0.0, 1.0, 0.25)
 
-ths = np.linspace(0.05, 0.95, 91)
-prec_list, rec_list, f1_list, profit_list = [], [], [], []
-
-y = y_test
-for t in ths:
-    pred = (proba >= t).astype(int)
-    prec_list.append(precision_score(y, pred, zero_division=0))
-    rec_list.append(recall_score(y, pred, zero_division=0))
-    f1_list.append(f1_score(y, pred, zero_division=0))
-
-    targeted = int(pred.sum())
-    tp = int(((pred == 1) & (y == 1)).sum())
-    saved = tp * value_per_churn * save_rate
-    cost = targeted * offer_cost
-    profit_list.append(saved - cost)
+ths = report["thresholds"]
+prec_list, rec_list, f1_list = report["precision"], report["recall"], report["f1"]
+profit_list = report["tp"] * value_per_churn * save_rate - report["targeted"] * offer_cost
 
 tf = go.Figure()
 tf.add_scatter(x=ths, y=prec_list, name="Precision", line=dict(width=4, color="#0066CC"))
 tf.add_scatter(x=ths, y=rec_list, name="Recall", line=dict(width=4, color="#28A745"))
 tf.add_scatter(x=ths, y=f1_list, name="F1", line=dict(width=4, color="#9C27B0"))
 tf.add_scatter(x=ths, y=profit_list, name="Expected Profit", yaxis="y2", line=dict(width=5, color="#DC3545"))
+profit_lo, profit_hi = profit_band(boot, value_per_churn, offer_cost, save_rate)
+tf.add_scatter(x=ths, y=profit_hi, yaxis="y2", mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip")
+tf.add_scatter(
+    x=ths, y=profit_lo, yaxis="y2", mode="lines", line=dict(width=0), fill="tonexty",
+    fillcolor="rgba(220,53,69,0.15)", name="Profit 95% CI",
+)
 
 tf.update_layout(
     xaxis_title="Threshold",
     yaxis_title="Score",
     yaxis2=dict(title="Profit", overlaying="y", side="right"),
 )
-st.plotly_chart(apply_layout(tf, "Choose a threshold that maximizes profit (not just accuracy)", height=600), use_container_width=True)
\ No newline at end of file
+plotly_chart(apply_layout(tf, "Choose a threshold that maximizes profit (not just accuracy)", height=600), use_container_width=True)
+
+# Calibration (reliability) chart
+mean_pred, frac_pos, counts = report["calibration"]
+has = counts > 0
+cal = go.Figure()
+cal.add_scatter(
+    x=mean_pred[has],
+    y=frac_pos[has],
+    mode="lines+markers",
+    line=dict(color="#0066CC", width=5),
+    marker=dict(size=12),
+    name="Model",
+    customdata=counts[has],
+    hovertemplate="Predicted %{x:.2f}<br>Observed %{y:.2f}<br>n=%{customdata}<extra></extra>",
+)
+cal.add_scatter(x=[0, 1], y=[0, 1], mode="lines", line=dict(color="#4A4A4A", dash="dash"), name="Perfect")
+cal.update_layout(xaxis_title="Mean predicted probability", yaxis_title="Observed churn rate")
+plotly_chart(apply_layout(cal, "Calibration (holdout)", height=520), use_container_width=True)
+
+# Per-segment models vs the global model (only when trained with segment_by)
+segments = report.get("segments")
+if segments:
+    table = segments["table"]
+    seg_fig = go.Figure()
+    seg_fig.add_bar(x=table["segment"], y=table["global_auc"], name="Global model", marker_color="#4A4A4A")
+    seg_fig.add_bar(x=table["segment"], y=table["segmented_auc"], name="Segment models", marker_color="#0066CC")
+    seg_fig.update_layout(barmode="group", yaxis_title="Holdout AUC", yaxis_range=[0.5, 1.0])
+    plotly_chart(apply_layout(seg_fig, f"Holdout AUC by {segments['by']}: global vs per-segment models", height=520), use_container_width=True)
+    st.caption(
+        f"Serving the {'per-segment' if segments['chosen'] else 'global'} model, chosen on a validation split "
+        f"(AUC {segments['val_segmented_auc']:.3f} per-segment vs {segments['val_global_auc']:.3f} global); "
+        "the bars above are test-set AUCs. "
+        "Segments without their own model (too few rows or churners) are scored by the global model."
+    )
+
+finish_run()
\ No newline at end of file
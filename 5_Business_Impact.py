@@ -1,38 +1,45 @@
 import streamlit as st
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
 from helpers_styling import inject_global_css
-from helpers_data import get_data_path, load_data, apply_filters
-from helpers_modeling import train_model, predict_batch, risk_level
-from helpers_business import revenue_at_risk, roi_simulator
+from helpers_data import get_data_path, load_data, sidebar_filters, apply_filters
+from helpers_modeling import predict_batch, risk_levels
+from helpers_business import economics_curve, campaign_surface, optimal_thresholds, optimize_targeting
 from helpers_charts import apply_layout
+from helpers_evaluation import THRESHOLDS
+from helpers_kpi import metric
+from helpers_perf import start_run, finish_run, stage, plotly_chart
+from helpers_snapshots import filter_key, get_model_bundle, serve_snapshot
 
 st.set_page_config(page_title="Business Impact", layout="wide")
 inject_global_css()
+start_run("Business Impact")
 
 st.title("Business Impact & Targeting")
 
 df = load_data(get_data_path())
 
-# Filters
-st.sidebar.header("Filters")
-geos = st.sidebar.multiselect("Geography", sorted(df["Geography"].unique().tolist()))
-age_range = st.sidebar.slider("Age Range", int(df["Age"].min()), int(df["Age"].max()), (25, 60))
-products = st.sidebar.multiselect("Num of Products", sorted(df["NumOfProducts"].unique().tolist()))
-active_member = st.sidebar.radio("Active Member", ["All", "Active", "Not Active"], index=0)
-dff = apply_filters(df, geos, age_range, products, active_member).copy()
+filters = sidebar_filters(df)
 
-# Train model once per session
-if "model_bundle" not in st.session_state:
-    with st.spinner("Training model (first run only)..."):
-        st.session_state["model_bundle"] = train_model(df)
+model, scaler, feat_cols, auc, report, explainer = get_model_bundle(df)
 
-model, scaler, feat_cols, auc, test_bundle, explainer = st.session_state["model_bundle"]
+if serve_snapshot("Business Impact", filters, report["version"]):
+    finish_run()
+    st.stop()
 
-# Predict
-dff["churn_proba"] = predict_batch(model, scaler, feat_cols, dff)
-dff["risk"] = dff["churn_proba"].apply(risk_level)
+# Filter, score and sort once per filter state and model; slider reruns below are only curve lookups
+impact_key = (filter_key(filters), report["version"])
+if st.session_state.get("impact_scored", (None,))[0] != impact_key:
+    dff = apply_filters(df, **filters).copy()
+    dff["churn_proba"] = predict_batch(model, scaler, feat_cols, dff)
+    with stage("risk tiers"):
+        dff["risk"] = risk_levels(dff["churn_proba"])
+    with stage("economics curve"):
+        curve = economics_curve(dff)
+    st.session_state["impact_scored"] = (impact_key, dff, curve)
+_, dff, curve = st.session_state["impact_scored"]
 
 # Donut: risk tiers
 risk_counts = dff["risk"].value_counts().reindex(["High", "Medium", "Low"]).fillna(0).reset_index()
@@ -45,14 +52,15 @@ donut = px.pie(
     color="risk",
     color_discrete_map={"High": "#DC3545", "Medium": "#FFA500", "Low": "#28A745"},
 )
-st.plotly_chart(apply_layout(donut, "Risk Tier Distribution", height=520), use_container_width=True)
+plotly_chart(apply_layout(donut, "Risk Tier Distribution", height=520), use_container_width=True)
 
 # Opportunity matrix (risk vs value proxy)
-seg = dff.groupby(["Geography", "risk"]).agg(
-    Customers=("Exited", "size"),
-    ChurnRate=("Exited", "mean"),
-    AvgValue=("ValueProxy", "mean"),
-).reset_index()
+with stage("groupby: geography x risk"):
+    seg = dff.groupby(["Geography", "risk"]).agg(
+        Customers=("Exited", "size"),
+        ChurnRate=("Exited", "mean"),
+        AvgValue=("ValueProxy", "mean"),
+    ).reset_index()
 
 opp = px.scatter(
     seg,
@@ -64,7 +72,7 @@ opp = px.scatter(
     hover_data=["Customers"],
 )
 opp.update_xaxes(tickformat=".0%")
-st.plotly_chart(apply_layout(opp, "Segment Opportunity Matrix (Risk vs Value)", height=600), use_container_width=True)
+plotly_chart(apply_layout(opp, "Segment Opportunity Matrix (Risk vs Value)", height=600), use_container_width=True)
 
 # ROI waterfall
 st.subheader("ROI Waterfall (campaign economics)")
@@ -74,15 +82,19 @@ threshold = col1.slider("Target High Risk threshold", 0.4, 0.9, 0.7, 0.05)
 save_rate = col2.slider("Expected save rate (lift)", 0.0, 1.0, 0.25, 0.05)
 offer_cost = col3.number_input("Offer cost per targeted customer", value=20.0, min_value=0.0)
 
-rev_risk = revenue_at_risk(dff, threshold=threshold)
-targeted = int((dff["churn_proba"] >= threshold).sum())
-saved, cost, net, roi = roi_simulator(rev_risk, save_rate, offer_cost, targeted)
+# Every slider position is a lookup into the cached cumulative curve
+point = campaign_surface(curve, threshold, save_rate, offer_cost)
+rev_risk = float(point["revenue_at_risk"][0, 0, 0])
+saved = float(point["saved"][0, 0, 0])
+cost = float(point["cost"][0, 0, 0])
+net = float(point["net"][0, 0, 0])
+roi = float(point["roi"][0, 0, 0])
 
 m1, m2, m3, m4 = st.columns(4)
-m1.metric("Revenue at Risk (proxy)", f"{rev_risk:,.0f}")
-m2.metric("Expected Saved Value", f"{saved:,.0f}")
-m3.metric("Campaign Cost", f"{cost:,.0f}")
-m4.metric("Net Impact", f"{net:,.0f}", delta=f"ROI {roi:.2f}x")
+metric(m1, "Revenue at Risk (proxy)", f"{rev_risk:,.0f}")
+metric(m2, "Expected Saved Value", f"{saved:,.0f}")
+metric(m3, "Campaign Cost", f"{cost:,.0f}")
+metric(m4, "Net Impact", f"{net:,.0f}", delta=f"ROI {roi:.2f}x")
 
 wf = go.Figure(
     go.Waterfall(
@@ -95,4 +107,64 @@ wf = go.Figure(
         totals={"marker": {"color": "#0066CC"}},
     )
 )
-st.plotly_chart(apply_layout(wf, "Business Waterfall: Risk → Saved → Cost → Net", height=600), use_container_width=True)
\ No newline at end of file
+plotly_chart(apply_layout(wf, "Business Waterfall: Risk → Saved → Cost → Net", height=600), use_container_width=True)
+
+# Net impact surface: every threshold x save rate at the chosen offer cost
+rates = np.round(np.linspace(0.05, 1.0, 20), 2)
+surface = campaign_surface(curve, THRESHOLDS, rates, offer_cost)
+best_th = optimal_thresholds(surface)[:, 0]
+
+hm = go.Figure(
+    go.Heatmap(
+        x=THRESHOLDS,
+        y=rates,
+        z=surface["net"][:, :, 0].T,
+        colorscale=["#DC3545", "#FFFFFF", "#28A745"],
+        zmid=0,
+        colorbar=dict(title="Net"),
+    )
+)
+hm.add_scatter(x=best_th, y=rates, mode="lines+markers", name="Best threshold", line=dict(color="#0066CC", width=4))
+hm.update_layout(xaxis_title="Threshold", yaxis_title="Save rate")
+plotly_chart(apply_layout(hm, "Net Impact Surface: Threshold × Save Rate (line = optimal threshold)", height=600), use_container_width=True)
+
+# Budget-constrained targeting
+st.subheader("Budget-constrained targeting (best customers for a fixed budget)")
+
+budget = st.number_input("Retention budget", value=50000.0, min_value=0.0, step=5000.0)
+geo_list = sorted(dff["Geography"].unique().tolist())
+cost_cols = st.columns(max(len(geo_list), 1))
+geo_costs, geo_quotas = {}, {}
+for col, g in zip(cost_cols, geo_list):
+    geo_costs[g] = col.number_input(f"Offer cost: {g}", value=float(offer_cost), min_value=0.0, key=f"cost_{g}")
+    quota = col.number_input(f"Max customers: {g} (0 = no cap)", value=0, min_value=0, step=50, key=f"quota_{g}")
+    if quota > 0:
+        geo_quotas[g] = int(quota)
+
+selected, (b_risk, b_saved, b_cost, b_net, b_roi) = optimize_targeting(
+    dff, budget, save_rate=save_rate, offer_cost=geo_costs, quotas=geo_quotas or None
+)
+
+b1, b2, b3, b4 = st.columns(4)
+metric(b1, "Customers Selected", f"{len(selected):,}")
+metric(b2, "Expected Saved Value", f"{b_saved:,.0f}")
+metric(b3, "Budget Used", f"{b_cost:,.0f}")
+metric(b4, "Net Impact", f"{b_net:,.0f}", delta=f"ROI {b_roi:.2f}x")
+
+bwf = go.Figure(
+    go.Waterfall(
+        orientation="v",
+        measure=["absolute", "relative", "relative", "total"],
+        x=["Revenue at Risk", "Saved (lift)", "Campaign Cost", "Net Impact"],
+        y=[b_risk, b_saved, -b_cost, b_risk + b_saved - b_cost],
+        increasing={"marker": {"color": "#28A745"}},
+        decreasing={"marker": {"color": "#DC3545"}},
+        totals={"marker": {"color": "#0066CC"}},
+    )
+)
+plotly_chart(apply_layout(bwf, "Budget Waterfall: Selected Customers", height=600), use_container_width=True)
+
+show_cols = [c for c in ["CustomerID", "Geography", "Age", "NumOfProducts", "churn_proba", "ValueProxy", "offer_cost", "expected_net"] if c in selected.columns]
+st.dataframe(selected[show_cols].head(500), use_container_width=True)
+
+finish_run()
\ No newline at end of file
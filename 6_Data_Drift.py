@@ -0,0 +1,149 @@
+from functools import reduce
+
+import streamlit as st
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from helpers_styling import inject_global_css
+from helpers_data import get_data_path, load_data, iter_data
+from helpers_modeling import predict_batch
+from helpers_monitoring import (
+    NUMERIC_BINS,
+    CATEGORICAL_COLS,
+    build_sketch,
+    merge_sketches,
+    compare_sketches,
+    hist_quantiles,
+    sketch_to_json,
+    sketch_from_json,
+)
+from helpers_charts import apply_layout
+from helpers_perf import start_run, finish_run, timed, cache_miss, plotly_chart
+from helpers_snapshots import get_model_bundle
+
+st.set_page_config(page_title="Data Drift", layout="wide")
+inject_global_css()
+start_run("Data Drift")
+
+st.title("Data & Score Drift Monitoring")
+
+df = load_data(get_data_path())
+
+model, scaler, feat_cols, auc, report, explainer = get_model_bundle(df)
+
+
+def scored_chunks(source, _model, _scaler, _feat_cols):
+    for chunk in iter_data(source):
+        chunk["churn_proba"] = predict_batch(_model, _scaler, _feat_cols, chunk)
+        yield chunk
+
+
+def sketch_source(source, _model, _scaler, _feat_cols) -> dict:
+    # One streaming pass: each chunk is scored and folded into the sketch, then dropped
+    return build_sketch(scored_chunks(source, _model, _scaler, _feat_cols))
+
+
+@timed("baseline_sketch", cached=True)
+@st.cache_data(show_spinner="Summarizing training data...")
+def baseline_sketch(csv_path: str, version: str, _model, _scaler, _feat_cols) -> dict:
+    cache_miss("baseline_sketch")
+    return sketch_source(csv_path, _model, _scaler, _feat_cols)
+
+
+@timed("upload_sketch", cached=True)
+@st.cache_data(show_spinner="Streaming new snapshot...", max_entries=8)
+def upload_sketch(file_id: str, version: str, _source, _model, _scaler, _feat_cols) -> dict:
+    # Keyed by the upload's id, so widget reruns (e.g. the feature selectbox) reuse the sketch
+    cache_miss("upload_sketch")
+    _source.seek(0)
+    return sketch_source(_source, _model, _scaler, _feat_cols)
+
+
+baseline = baseline_sketch(str(get_data_path()), report["version"], model, scaler, feat_cols)
+
+st.sidebar.header("Snapshot to compare")
+uploaded = st.sidebar.file_uploader("New churn CSV", type=["csv"])
+saved = st.sidebar.file_uploader(
+    "…or saved snapshots (JSON; several are merged, e.g. daily into monthly)", type=["json"], accept_multiple_files=True
+)
+
+if uploaded is not None:
+    current = upload_sketch(uploaded.file_id, report["version"], uploaded, model, scaler, feat_cols)
+elif saved:
+    current = reduce(merge_sketches, (sketch_from_json(f.getvalue().decode("utf-8")) for f in saved))
+else:
+    st.info("Upload a newer churn CSV (or a saved snapshot) in the sidebar to compare it with the training data.")
+    st.download_button("Download training snapshot (JSON)", sketch_to_json(baseline), file_name="baseline_snapshot.json")
+    finish_run()
+    st.stop()
+
+st.download_button("Download this snapshot (JSON)", sketch_to_json(current), file_name="snapshot.json")
+
+drift = compare_sketches(baseline, current)
+
+c1, c2, c3 = st.columns(3)
+c1.metric("Training rows", f"{baseline['n']:,}")
+c2.metric("Snapshot rows", f"{current['n']:,}")
+score_row = drift[drift["Feature"] == "churn_proba"]
+c3.metric("Score PSI", f"{float(score_row['PSI'].iloc[0]):.3f}" if len(score_row) else "n/a")
+
+# PSI by feature
+bar = px.bar(
+    drift,
+    x="Feature",
+    y="PSI",
+    color="Drift",
+    text="PSI",
+    color_discrete_map={"High": "#DC3545", "Medium": "#FFA500", "Low": "#28A745"},
+)
+bar.update_traces(texttemplate="%{text:.3f}", textposition="outside")
+bar.add_hline(y=0.10, line_width=3, line_dash="dash", line_color="#FFA500")
+bar.add_hline(y=0.25, line_width=3, line_dash="dash", line_color="#DC3545")
+plotly_chart(apply_layout(bar, "Population Stability Index by Feature (0.10 / 0.25 guides)"), use_container_width=True)
+
+st.dataframe(drift.style.format({"PSI": "{:.3f}", "KS": "{:.3f}"}), use_container_width=True)
+
+# Score distribution shift
+edges = NUMERIC_BINS["churn_proba"]
+centers = (edges[:-1] + edges[1:]) / 2
+# Interior bins only; a score of exactly 1.0 falls in the overflow bin and is folded into the last one
+bh, ch = baseline["hist"]["churn_proba"], current["hist"]["churn_proba"]
+base_h = np.r_[bh[1:-2], bh[-2] + bh[-1]]
+cur_h = np.r_[ch[1:-2], ch[-2] + ch[-1]]
+sd = go.Figure()
+sd.add_bar(x=centers, y=base_h / max(base_h.sum(), 1), name="Training", marker_color="#0066CC", opacity=0.6)
+sd.add_bar(x=centers, y=cur_h / max(cur_h.sum(), 1), name="Snapshot", marker_color="#DC3545", opacity=0.6)
+sd.update_layout(barmode="overlay", xaxis_title="Churn probability", yaxis_title="Share of customers", yaxis_tickformat=".0%")
+plotly_chart(apply_layout(sd, "Churn Score Distribution: Training vs Snapshot", height=560), use_container_width=True)
+
+# Feature detail
+feature = st.selectbox("Feature detail", [c for c in NUMERIC_BINS if c != "churn_proba"] + CATEGORICAL_COLS)
+if feature in NUMERIC_BINS:
+    qs = (0.05, 0.25, 0.5, 0.75, 0.95)
+    st.write(
+        "Approx. quantiles (5/25/50/75/95%) — training: "
+        + ", ".join(f"{v:,.0f}" for v in hist_quantiles(baseline, feature, qs))
+        + " · snapshot: "
+        + ", ".join(f"{v:,.0f}" for v in hist_quantiles(current, feature, qs))
+    )
+    e = NUMERIC_BINS[feature]
+    x = np.r_[e, e[-1]]
+    b = baseline["hist"][feature]
+    c = current["hist"][feature]
+    ff = go.Figure()
+    ff.add_scatter(x=x, y=np.cumsum(b) / max(b.sum(), 1), name="Training", line=dict(color="#0066CC", width=4), line_shape="hv")
+    ff.add_scatter(x=x, y=np.cumsum(c) / max(c.sum(), 1), name="Snapshot", line=dict(color="#DC3545", width=4), line_shape="hv")
+    ff.update_layout(xaxis_title=feature, yaxis_title="Cumulative share", yaxis_tickformat=".0%")
+    plotly_chart(apply_layout(ff, f"{feature}: Cumulative Distribution", height=560), use_container_width=True)
+else:
+    cats = sorted(set(baseline["freq"][feature]) | set(current["freq"][feature]))
+    b = np.array([baseline["freq"][feature].get(k, 0) for k in cats], dtype=float)
+    c = np.array([current["freq"][feature].get(k, 0) for k in cats], dtype=float)
+    ff = go.Figure()
+    ff.add_bar(x=cats, y=b / max(b.sum(), 1), name="Training", marker_color="#0066CC")
+    ff.add_bar(x=cats, y=c / max(c.sum(), 1), name="Snapshot", marker_color="#DC3545")
+    ff.update_layout(barmode="group", yaxis_title="Share of customers", yaxis_tickformat=".0%")
+    plotly_chart(apply_layout(ff, f"{feature}: Category Mix", height=560), use_container_width=True)
+
+finish_run()
\ No newline at end of file
@@ -0,0 +1,62 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+
+from helpers_styling import inject_global_css
+from helpers_charts import apply_layout
+from helpers_perf import stage_table, cache_table, export_json
+
+st.set_page_config(page_title="Diagnostics", layout="wide")
+inject_global_css()
+
+st.title("Performance Diagnostics")
+
+runs = st.session_state.get("perf_runs", [])
+if not runs:
+    st.info(
+        "No timings recorded yet. Tick \"Performance diagnostics\" in the sidebar of any page, "
+        "interact with it, then come back here."
+    )
+    st.stop()
+
+pages = sorted({r["page"] for r in runs})
+picked = st.multiselect("Pages", pages, default=pages)
+sel = [r for r in runs if r["page"] in picked]
+
+c1, c2, c3 = st.columns(3)
+c1.metric("Reruns recorded", f"{len(sel):,}")
+c2.metric("Mean rerun time", f"{sum(r['total_seconds'] for r in sel) / max(len(sel), 1):.2f}s")
+c3.metric("Slowest rerun", f"{max((r['total_seconds'] for r in sel), default=0.0):.2f}s")
+
+# Per-rerun totals
+totals = pd.DataFrame({
+    "run": range(1, len(sel) + 1),
+    "page": [r["page"] for r in sel],
+    "seconds": [r["total_seconds"] for r in sel],
+})
+tf = px.bar(totals, x="run", y="seconds", color="page")
+st.plotly_chart(apply_layout(tf, "Rerun Wall Time"), use_container_width=True)
+
+# Where the time goes
+stages = stage_table(sel)
+top = stages.head(20)
+sf = px.bar(top, x="total_s", y="stage", color="page", orientation="h", hover_data=["calls", "mean_s", "max_s"])
+sf.update_layout(yaxis=dict(autorange="reversed"), xaxis_title="Total seconds")
+st.plotly_chart(apply_layout(sf, "Top Stages by Total Time", height=700), use_container_width=True)
+st.dataframe(stages, use_container_width=True)
+
+st.subheader("Cache hits / misses")
+st.dataframe(cache_table(sel), use_container_width=True)
+
+st.subheader("Chart payload sizes")
+payloads = pd.DataFrame([p for r in sel for p in r["payloads"]], columns=["chart", "bytes"])
+if not payloads.empty:
+    payloads = payloads.groupby("chart")["bytes"].agg(renders="size", mean_bytes="mean", max_bytes="max").reset_index()
+    payloads = payloads.sort_values("max_bytes", ascending=False)
+st.dataframe(payloads, use_container_width=True)
+
+d1, d2 = st.columns(2)
+d1.download_button("Export timings (JSON)", export_json(sel), file_name="perf_diagnostics.json")
+if d2.button("Clear recorded timings"):
+    st.session_state["perf_runs"] = []
+    st.rerun()
\ No newline at end of file
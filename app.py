@@ -21,5 +21,7 @@ st.info(
     "- 2_Customer_Analysis\n"
     "- 3_ML_Predictions\n"
     "- 4_Model_Performance\n"
-    "- 5_Business_Impact"
+    "- 5_Business_Impact\n"
+    "- 6_Data_Drift\n"
+    "- 7_Diagnostics"
 )
\ No newline at end of file
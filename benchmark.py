@@ -0,0 +1,161 @@
+"""
+Benchmark the dashboard hot paths on synthetic data at production-like volumes.
+
+    python benchmark.py                       # 100k and 1M rows, compare with stored baselines
+    python benchmark.py --scales 10m          # one scale
+    python benchmark.py --update-baseline     # record current timings as the new baselines
+
+Synthetic files are generated once from the bundled CSV into bench_data/.
+A stage fails when its time or peak memory exceeds baseline x tolerance, or when it has no baseline yet.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from helpers_data import DEFAULT_FILTERS, get_data_path, load_data, apply_filters
+from helpers_modeling import train_model, predict_batch, risk_levels
+from helpers_business import revenue_at_risk
+from helpers_advanced_charts import sankey_customer_journey, sunburst_value_segments, pareto_churn_segments
+from helpers_hotspots import build_cube, mine_hotspots
+from helpers_stats import build_moments, check_moments
+from helpers_synthetic import write_synthetic_csv
+
+
+SCALES = {"100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+STAGES = [
+    "load_data", "apply_filters", "train_model", "train_segmented", "predict_batch",
+    "sankey", "sunburst", "pareto", "revenue_at_risk", "hotspots", "moments",
+]
+# Filter states the merged moments are checked against pandas for
+MOMENT_CHECK_FILTERS = [
+    DEFAULT_FILTERS,
+    {"geos": ["Germany"], "age_range": (18, 92), "products": [], "active_member": "Not Active"},
+    {"geos": ["France", "Spain"], "age_range": (30, 50), "products": [1, 2], "active_member": "Active"},
+]
+MOMENT_TOLERANCE = 1e-8
+DATA_DIR = Path("bench_data")
+BASELINE_PATH = Path("benchmark_baselines.json")
+
+
+def measure(fn, *args, **kwargs):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    seconds = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {"seconds": round(seconds, 4), "peak_mb": round(peak / 2**20, 2)}
+
+
+def synthetic_path(scale: str, seed: int) -> Path:
+    path = DATA_DIR / f"customers_{scale}.csv"
+    if not path.exists():
+        source = load_data(get_data_path())
+        print(f"Generating {SCALES[scale]:,} rows -> {path}")
+        write_synthetic_csv(source, path, SCALES[scale], seed=seed)
+    return path
+
+
+def run_scale(scale: str, stages: list[str], seed: int) -> dict[str, dict]:
+    path = synthetic_path(scale, seed)
+    results = {}
+
+    load_data.clear()
+    df, results["load_data"] = measure(load_data, path)
+
+    if "apply_filters" in stages:
+        _, results["apply_filters"] = measure(apply_filters, df, ["France", "Germany"], (25, 60), [1, 2], "Active")
+
+    # Scoring and the downstream stages need a model even when train_model is not being timed
+    if "train_model" in stages:
+        bundle, results["train_model"] = measure(train_model, df, seed)
+    else:
+        bundle = train_model(df.sample(min(len(df), 50_000), random_state=seed), seed)
+    model, scaler, feat_cols, auc, report, explainer = bundle
+
+    # Global + per-Geography models fitted in parallel; compare its time with train_model
+    if "train_segmented" in stages:
+        _, results["train_segmented"] = measure(train_model, df, seed, "Geography")
+
+    proba, stats = measure(predict_batch, model, scaler, feat_cols, df)
+    if "predict_batch" in stages:
+        results["predict_batch"] = stats
+    df["churn_proba"] = proba
+
+    charts = {"sankey": sankey_customer_journey, "sunburst": sunburst_value_segments, "pareto": pareto_churn_segments}
+    for name, builder in charts.items():
+        if name in stages:
+            _, results[name] = measure(builder, df)
+
+    if "revenue_at_risk" in stages:
+        _, results["revenue_at_risk"] = measure(revenue_at_risk, df)
+
+    if "hotspots" in stages:
+        df["risk"] = risk_levels(proba)
+        _, results["hotspots"] = measure(lambda d: mine_hotspots(build_cube(d)), df)
+
+    # Correctness as well as speed: KPIs and correlations are merged from these per-cell moments
+    if "moments" in stages:
+        moments, results["moments"] = measure(build_moments, df)
+        results["moments"]["max_gap"] = max(check_moments(moments, df, f) for f in MOMENT_CHECK_FILTERS)
+
+    if "load_data" not in stages:
+        del results["load_data"]
+    return results
+
+
+def compare(results: dict, baselines: dict, tolerance: float) -> list[str]:
+    failures = []
+    for scale, stages in results.items():
+        for stage, stats in stages.items():
+            if stats.get("max_gap", 0.0) > MOMENT_TOLERANCE:
+                failures.append(f"{scale}/{stage}: moments differ from pandas by {stats['max_gap']:.3g}")
+            base = baselines.get(scale, {}).get(stage)
+            if not base:
+                failures.append(f"{scale}/{stage}: no baseline in {BASELINE_PATH} (record one with --update-baseline)")
+                continue
+            for key in ("seconds", "peak_mb"):
+                if base[key] > 0 and stats[key] > base[key] * tolerance:
+                    failures.append(f"{scale}/{stage}: {key} {stats[key]} > {base[key]} x {tolerance}")
+    return failures
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["100k", "1m"])
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for scale in args.scales:
+        results[scale] = run_scale(scale, args.stages, args.seed)
+        for stage, stats in results[scale].items():
+            print(f"{scale:>5}  {stage:<16} {stats['seconds']:>10.3f}s  {stats['peak_mb']:>10.1f} MB")
+
+    baselines = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+
+    if args.update_baseline:
+        for scale, stages in results.items():
+            baselines.setdefault(scale, {}).update(stages)
+        BASELINE_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True))
+        print(f"Baselines written to {BASELINE_PATH}")
+        return 0
+
+    failures = compare(results, baselines, args.tolerance)
+    for f in failures:
+        print(f"FAIL {f}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -5,8 +5,10 @@ import plotly.graph_objects as go
 import plotly.express as px
 
 from helpers_charts import apply_layout
+from helpers_perf import timed
 
 
+@timed("sankey_customer_journey")
 def sankey_customer_journey(df: pd.DataFrame):
     g = df["Geography"].astype(str)
     p = df["NumOfProducts"].astype(str).map(lambda x: f"{x} Products")
@@ -45,9 +47,11 @@ def sankey_customer_journey(df: pd.DataFrame):
     return apply_layout(fig, "Customer Journey Flow: Geography → Products → Activity → Outcome", height=650)
 
 
+@timed("sunburst_value_segments")
 def sunburst_value_segments(df: pd.DataFrame):
+    # Zero-value customers add no area, and a segment made only of them has no value-weighted churn colour
     fig = px.sunburst(
-        df,
+        df[df["ValueProxy"] > 0],
         path=["Geography", "AgeBand", "NumOfProducts"],
         values="ValueProxy",
         color="Exited",
@@ -56,36 +60,45 @@ def sunburst_value_segments(df: pd.DataFrame):
     return apply_layout(fig, "Value Segments (ValueProxy = Balance × (Tenure+1))", height=650)
 
 
+@timed("pareto_churn_segments")
 def pareto_churn_segments(df: pd.DataFrame):
-    d = df.copy()
-    d["segment"] = (
-        d["Geography"].astype(str)
+    # Group on the raw columns and label only the resulting segments, not every row
+    churned = (
+        df[df["Exited"] == 1]
+        .groupby(["Geography", "IsActiveMember", "NumOfProducts"], observed=True)
+        .size()
+        .reset_index(name="churned")
+    )
+    churned["segment"] = (
+        churned["Geography"].astype(str)
         + " | "
-        + d["IsActiveMember"].map({1: "Active", 0: "Not Active"})
+        + churned["IsActiveMember"].map({1: "Active", 0: "Not Active"})
         + " | "
-        + d["NumOfProducts"].astype(str)
+        + churned["NumOfProducts"].astype(str)
         + "P"
     )
+    return pareto_segments(churned, "churned", "Pareto: Which segments explain most churn?")
 
-    churned = (
-        d[d["Exited"] == 1]
-        .groupby("segment")
-        .size()
-        .sort_values(ascending=False)
-        .reset_index(name="ChurnedCount")
-    )
 
-    if churned.empty:
+@timed("pareto_segments")
+def pareto_segments(segments: pd.DataFrame, metric: str = "churned", title: str | None = None):
+    """Pareto chart of a disjoint segment table (segment label + metric column), sorted by the metric."""
+    labels = {"churned": ("Churned customers", "Cumulative % of churn"),
+              "value_at_risk": ("Value at risk", "Cumulative % of value at risk")}
+    bar_name, cum_name = labels.get(metric, (metric, f"Cumulative % of {metric}"))
+
+    seg = segments[segments[metric] > 0].sort_values(metric, ascending=False)
+    if seg.empty:
         # Avoid divide by zero errors if filters remove churned customers
-        churned = pd.DataFrame({"segment": [], "ChurnedCount": [], "CumPct": []})
+        seg = pd.DataFrame({"segment": [], metric: [], "CumPct": []})
     else:
-        churned["CumPct"] = churned["ChurnedCount"].cumsum() / churned["ChurnedCount"].sum()
+        seg = seg.assign(CumPct=seg[metric].cumsum() / seg[metric].sum())
 
     fig = go.Figure()
-    fig.add_bar(x=churned["segment"], y=churned["ChurnedCount"], name="Churned customers", marker_color="#DC3545")
+    fig.add_bar(x=seg["segment"], y=seg[metric], name=bar_name, marker_color="#DC3545")
     fig.add_scatter(
-        x=churned["segment"],
-        y=churned["CumPct"],
+        x=seg["segment"],
+        y=seg["CumPct"],
         name="Cumulative %",
         yaxis="y2",
         mode="lines+markers",
@@ -94,8 +107,8 @@ def pareto_churn_segments(df: pd.DataFrame):
     )
 
     fig.update_layout(
-        yaxis=dict(title="Churned customers"),
-        yaxis2=dict(title="Cumulative % of churn", overlaying="y", side="right", tickformat=".0%"),
+        yaxis=dict(title=bar_name),
+        yaxis2=dict(title=cum_name, overlaying="y", side="right", tickformat=".0%"),
         xaxis=dict(title="Segment (sorted)"),
     )
-    return apply_layout(fig, "Pareto: Which segments explain most churn?", height=620)
\ No newline at end of file
+    return apply_layout(fig, title or f"Pareto: Which segments explain most {bar_name.lower()}?", height=620)
\ No newline at end of file
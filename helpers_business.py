@@ -1,7 +1,11 @@
 from __future__ import annotations
+import numpy as np
 import pandas as pd
 
+from helpers_perf import timed
 
+
+@timed("revenue_at_risk")
 def revenue_at_risk(
     df: pd.DataFrame,
     p_col: str = "churn_proba",
@@ -39,4 +43,167 @@ def roi_simulator(
     cost = float(offer_cost_per_cust) * int(targeted_customers)
     net = expected_saved - cost
     roi = (net / cost) if cost > 0 else 0.0
-    return expected_saved, cost, net, roi
\ No newline at end of file
+    return expected_saved, cost, net, roi
+
+
+@timed("economics_curve")
+def economics_curve(
+    df: pd.DataFrame,
+    p_col: str = "churn_proba",
+    value_col: str = "ValueProxy",
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sort customers by churn probability once and build the tail sums of expected loss.
+    Returns (proba ascending, tail_loss) where tail_loss[i] = sum of ValueProxy * churn_probability
+    over proba[i:], with a trailing 0.0 so every threshold maps to a valid index.
+    """
+    if df.empty or p_col not in df.columns or value_col not in df.columns:
+        return np.empty(0), np.zeros(1)
+
+    p = df[p_col].to_numpy(dtype=float)
+    v = df[value_col].to_numpy(dtype=float)
+    keep = ~np.isnan(p)
+    p, v = p[keep], np.nan_to_num(v[keep])
+
+    order = np.argsort(p, kind="stable")
+    p_sorted = p[order]
+    loss = (v * p)[order]
+    tail_loss = np.append(np.cumsum(loss[::-1])[::-1], 0.0)
+    return p_sorted, tail_loss
+
+
+@timed("campaign_surface")
+def campaign_surface(
+    curve: tuple[np.ndarray, np.ndarray],
+    thresholds,
+    save_rates=0.25,
+    offer_costs=20.0,
+) -> dict[str, np.ndarray]:
+    """
+    Vectorized revenue_at_risk + roi_simulator for every threshold x save rate x offer cost.
+    Arrays are shaped (len(thresholds), len(save_rates), len(offer_costs)); scalars count as length 1.
+    """
+    p_sorted, tail_loss = curve
+    t = np.atleast_1d(np.asarray(thresholds, dtype=float))
+    s = np.atleast_1d(np.asarray(save_rates, dtype=float))
+    c = np.atleast_1d(np.asarray(offer_costs, dtype=float))
+
+    idx = np.searchsorted(p_sorted, t, side="left")
+    risk = tail_loss[idx][:, None, None]
+    targeted = (len(p_sorted) - idx)[:, None, None]
+
+    saved = risk * s[None, :, None]
+    cost = targeted * c[None, None, :]
+    net = saved - cost
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(cost > 0, net / np.where(cost > 0, cost, 1.0), 0.0)
+
+    shape = (len(t), len(s), len(c))
+    return {
+        "threshold": t,
+        "save_rate": s,
+        "offer_cost": c,
+        "revenue_at_risk": np.broadcast_to(risk, shape),
+        "targeted": np.broadcast_to(targeted, shape),
+        "saved": np.broadcast_to(saved, shape),
+        "cost": np.broadcast_to(cost, shape),
+        "net": np.broadcast_to(net, shape),
+        "roi": np.broadcast_to(roi, shape),
+    }
+
+
+def optimal_thresholds(surface: dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Net-maximizing threshold for every (save rate, offer cost) pair, shaped (len(save_rates), len(offer_costs)).
+    """
+    best = np.argmax(surface["net"], axis=0)
+    return surface["threshold"][best]
+
+
+def _greedy_within_budget(order: np.ndarray, cost: np.ndarray, budget: float) -> np.ndarray:
+    """
+    Walk `order` taking every customer still affordable, skipping (not stopping at) ones that are not.
+    Each round takes the longest affordable prefix; the customer that broke it can no longer fit and is dropped.
+    """
+    parts = []
+    remaining = float(budget)
+    rest = order
+    while len(rest):
+        rest = rest[cost[rest] <= remaining]
+        if not len(rest):
+            break
+        spent = np.cumsum(cost[rest])
+        n = int(np.searchsorted(spent, remaining, side="right"))
+        parts.append(rest[:n])
+        remaining -= float(spent[n - 1])
+        rest = rest[n:]
+    return np.concatenate(parts) if parts else order[:0]
+
+
+@timed("optimize_targeting")
+def optimize_targeting(
+    df: pd.DataFrame,
+    budget: float,
+    save_rate: float = 0.25,
+    offer_cost: float | dict[str, float] = 20.0,
+    segment_col: str = "Geography",
+    quotas: dict[str, int] | None = None,
+    p_col: str = "churn_proba",
+    value_col: str = "ValueProxy",
+):
+    """
+    Pick the customers maximizing expected net value under a retention budget.
+    Expected net per customer = ValueProxy * churn_probability * save_rate - offer cost.
+    offer_cost may be a dict keyed by segment_col (segments missing from it are not targeted);
+    quotas caps the number of selected customers per segment.
+    Returns (selected customers sorted by expected net, (revenue_risk, saved, cost, net, roi)).
+    """
+    empty = (0.0, 0.0, 0.0, 0.0, 0.0)
+    if df.empty or p_col not in df.columns or value_col not in df.columns:
+        return df.iloc[0:0], empty
+
+    p = np.nan_to_num(df[p_col].to_numpy(dtype=float))
+    loss = np.nan_to_num(df[value_col].to_numpy(dtype=float)) * p
+    if isinstance(offer_cost, dict):
+        cost = df[segment_col].map(offer_cost).to_numpy(dtype=float)
+    else:
+        cost = np.full(len(df), float(offer_cost))
+    net = loss * float(save_rate) - cost
+
+    # Only customers worth contacting on their own are candidates
+    cand = np.flatnonzero((net > 0) & np.isfinite(cost))
+
+    if quotas:
+        codes, uniques = pd.factorize(df[segment_col].to_numpy()[cand])
+        keep = []
+        for code, seg in enumerate(uniques):
+            members = cand[codes == code]
+            cap = quotas.get(seg)
+            if cap is not None and len(members) > cap:
+                members = members[np.argpartition(-net[members], cap - 1)[:cap]] if cap > 0 else members[:0]
+            keep.append(members)
+        cand = np.concatenate(keep) if keep else cand[:0]
+
+    # Partial sort: with one offer cost the greedy pass takes a prefix, so only the top
+    # budget / cost customers can be chosen (with mixed costs a cheaper, lower-ranked one may still fit)
+    if len(cand) and budget < np.inf:
+        c = cost[cand]
+        if c.min() > 0 and c.min() == c.max():
+            k = int(min(len(cand), budget // c.min()))
+            if k < len(cand):
+                cand = cand[np.argpartition(-net[cand], k - 1)[:k]] if k > 0 else cand[:0]
+
+    order = cand[np.argsort(-net[cand], kind="stable")]
+    chosen = _greedy_within_budget(order, cost, budget)
+
+    selected = df.iloc[chosen].copy()
+    selected["offer_cost"] = cost[chosen]
+    selected["expected_saved"] = loss[chosen] * float(save_rate)
+    selected["expected_net"] = net[chosen]
+
+    rev_risk = float(loss[chosen].sum())
+    saved = rev_risk * float(save_rate)
+    total_cost = float(cost[chosen].sum())
+    total_net = saved - total_cost
+    roi = (total_net / total_cost) if total_cost > 0 else 0.0
+    return selected, (rev_risk, saved, total_cost, total_net, roi)
\ No newline at end of file
@@ -1,22 +1,37 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Iterator
 import pandas as pd
 import streamlit as st
 
+from helpers_perf import timed, cache_miss
+
 
 DEFAULT_CSV_NAME = "Bank Customer Churn Prediction.csv"
 
+DEFAULT_FILTERS = {"geos": [], "age_range": (25, 60), "products": [], "active_member": "All"}
+
 
 def get_data_path() -> Path:
     # Repo root is current working directory on Streamlit Cloud
     return Path(DEFAULT_CSV_NAME)
 
 
+@timed("load_data", cached=True)
 @st.cache_data
 def load_data(csv_path: str | Path) -> pd.DataFrame:
-    df = pd.read_csv(csv_path)
+    cache_miss("load_data")
+    return normalize_columns(pd.read_csv(csv_path))
+
+
+def iter_data(csv_source, chunksize: int = 200_000) -> Iterator[pd.DataFrame]:
+    """Stream a churn CSV (path or file-like) as normalized chunks, without holding the full frame."""
+    for chunk in pd.read_csv(csv_source, chunksize=chunksize):
+        yield normalize_columns(chunk)
 
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     # Normalize common Kaggle column variants
     rename_map = {
         "CustomerId": "CustomerID",
@@ -33,6 +48,11 @@ def load_data(csv_path: str | Path) -> pd.DataFrame:
         "balance": "Balance",
         "exited": "Exited",
         "surname": "Surname",
+        "country": "Geography",
+        "products_number": "NumOfProducts",
+        "credit_card": "HasCrCard",
+        "active_member": "IsActiveMember",
+        "churn": "Exited",
     }
     df.rename(columns={c: rename_map[c] for c in df.columns if c in rename_map}, inplace=True)
 
@@ -59,6 +79,19 @@ def load_data(csv_path: str | Path) -> pd.DataFrame:
     return df
 
 
+def sidebar_filters(df: pd.DataFrame) -> dict:
+    """The shared sidebar filter block; returns keyword arguments for apply_filters."""
+    st.sidebar.header("Filters")
+    geos = st.sidebar.multiselect("Geography", sorted(df["Geography"].unique().tolist()), key="filter_geos")
+    age_range = st.sidebar.slider(
+        "Age Range", int(df["Age"].min()), int(df["Age"].max()), DEFAULT_FILTERS["age_range"], key="filter_age"
+    )
+    products = st.sidebar.multiselect("Num of Products", sorted(df["NumOfProducts"].unique().tolist()), key="filter_products")
+    active_member = st.sidebar.radio("Active Member", ["All", "Active", "Not Active"], index=0, key="filter_active")
+    return {"geos": geos, "age_range": tuple(age_range), "products": products, "active_member": active_member}
+
+
+@timed("apply_filters")
 def apply_filters(
     df: pd.DataFrame,
     geos: list[str],
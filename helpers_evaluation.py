@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import streamlit as st
+from sklearn.metrics import roc_curve, precision_recall_curve, roc_auc_score
+
+from helpers_perf import timed, cache_miss
+
+
+THRESHOLDS = np.round(np.linspace(0.05, 0.95, 91), 2)
+FPR_GRID = np.linspace(0.0, 1.0, 101)
+RECALL_GRID = np.linspace(0.0, 1.0, 101)
+
+CONFUSION_THRESHOLDS = (0.3, 0.5, 0.7)
+CALIBRATION_BINS = 10
+
+# Resamples are drawn in chunks of at most CHUNK_CELLS (n_boot x n_test) so the count matrices stay
+# small; above PARALLEL_MIN_CELLS the chunks are spread across processes
+PARALLEL_MIN_CELLS = 20_000_000
+CHUNK_CELLS = 5_000_000
+
+
+def model_version(y_true: np.ndarray, proba: np.ndarray) -> str:
+    """Fingerprint of a model's held-out predictions, used as a cache key."""
+    h = hashlib.sha1()
+    h.update(np.ascontiguousarray(y_true, dtype=np.int8).tobytes())
+    h.update(np.ascontiguousarray(proba, dtype=np.float64).tobytes())
+    return h.hexdigest()[:16]
+
+
+def threshold_counts(y_true: np.ndarray, proba: np.ndarray, thresholds) -> tuple[np.ndarray, np.ndarray]:
+    """TP and predicted-positive counts for `proba >= t` at every threshold, from one sort."""
+    order = np.argsort(proba, kind="stable")
+    p_sorted = proba[order]
+    pos_tail = np.append(np.cumsum(y_true[order][::-1])[::-1], 0)
+    idx = np.searchsorted(p_sorted, np.asarray(thresholds, dtype=float), side="left")
+    return pos_tail[idx], len(p_sorted) - idx
+
+
+def evaluation_report(y_true: np.ndarray, proba: np.ndarray) -> dict:
+    """
+    Everything the Model Performance page renders, computed once from the holdout predictions:
+    ROC/PR arrays, calibration bins, confusion matrices at CONFUSION_THRESHOLDS and
+    precision/recall/F1/TP/targeted counts at THRESHOLDS.
+    """
+    y_true = np.asarray(y_true).astype(int)
+    proba = np.asarray(proba, dtype=float)
+
+    fpr, tpr, _ = roc_curve(y_true, proba)
+    prec, rec, _ = precision_recall_curve(y_true, proba)
+
+    n_pos = int(y_true.sum())
+    n_neg = len(y_true) - n_pos
+    tp, targeted = threshold_counts(y_true, proba, THRESHOLDS)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_prec = np.where(targeted > 0, tp / np.maximum(targeted, 1), 0.0)
+        t_rec = tp / n_pos if n_pos else np.zeros(len(THRESHOLDS))
+        t_f1 = np.where(t_prec + t_rec > 0, 2 * t_prec * t_rec / (t_prec + t_rec), 0.0)
+
+    confusion = {}
+    c_tp, c_targeted = threshold_counts(y_true, proba, CONFUSION_THRESHOLDS)
+    for t, tp_t, pp_t in zip(CONFUSION_THRESHOLDS, c_tp, c_targeted):
+        fp_t = pp_t - tp_t
+        confusion[t] = np.array([[n_neg - fp_t, fp_t], [n_pos - tp_t, tp_t]], dtype=int)
+
+    bins = np.minimum((proba * CALIBRATION_BINS).astype(int), CALIBRATION_BINS - 1)
+    counts = np.bincount(bins, minlength=CALIBRATION_BINS)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_pred = np.bincount(bins, weights=proba, minlength=CALIBRATION_BINS) / counts
+        frac_pos = np.bincount(bins, weights=y_true, minlength=CALIBRATION_BINS) / counts
+
+    return {
+        "version": model_version(y_true, proba),
+        "y_true": y_true,
+        "proba": proba,
+        "auc": float(roc_auc_score(y_true, proba)),
+        "roc": (fpr, tpr),
+        "pr": (prec, rec),
+        "calibration": (mean_pred, frac_pos, counts),
+        "confusion": confusion,
+        "thresholds": THRESHOLDS,
+        "precision": t_prec,
+        "recall": t_rec,
+        "f1": t_f1,
+        "tp": tp,
+        "targeted": targeted,
+    }
+
+
+def _resample_counts(n: int, n_boot: int, rng: np.random.Generator) -> np.ndarray:
+    # (n_boot, n) index matrix -> how many times each held-out row is drawn in each resample
+    idx = rng.integers(0, n, size=(n_boot, n))
+    idx += (np.arange(n_boot) * n)[:, None]
+    return np.bincount(idx.ravel(), minlength=n_boot * n).reshape(n_boot, n)
+
+
+def _bootstrap_chunk(y_true: np.ndarray, proba: np.ndarray, n_boot: int, seed) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    counts = _resample_counts(len(y_true), n_boot, rng)
+
+    # Group rows by distinct score (descending) so ties are handled like roc_curve does
+    order = np.argsort(-proba, kind="stable")
+    p_sorted = proba[order]
+    y_sorted = y_true[order].astype(bool)
+    starts = np.flatnonzero(np.r_[True, p_sorted[1:] != p_sorted[:-1]])
+    levels = p_sorted[starts]
+
+    w = counts[:, order]
+    tp = np.cumsum(np.add.reduceat(w * y_sorted, starts, axis=1), axis=1)
+    fp = np.cumsum(np.add.reduceat(w * ~y_sorted, starts, axis=1), axis=1)
+    tp = np.hstack([np.zeros((n_boot, 1), dtype=tp.dtype), tp])
+    fp = np.hstack([np.zeros((n_boot, 1), dtype=fp.dtype), fp])
+
+    pos = tp[:, -1].astype(float)
+    neg = fp[:, -1].astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tpr = tp / pos[:, None]
+        fpr = fp / neg[:, None]
+        precision = tp[:, 1:] / (tp[:, 1:] + fp[:, 1:])
+        recall = tpr[:, 1:]
+
+    auc = np.trapz(tpr, fpr, axis=1)
+
+    tpr_grid = np.empty((n_boot, len(FPR_GRID)))
+    prec_grid = np.empty((n_boot, len(RECALL_GRID)))
+    for b in range(n_boot):
+        tpr_grid[b] = np.interp(FPR_GRID, fpr[b], tpr[b])
+        prec_grid[b] = np.interp(RECALL_GRID, recall[b], precision[b])
+
+    # Counts at the fixed threshold grid feed the profit band for any page inputs
+    k = np.searchsorted(-levels, -THRESHOLDS, side="right")
+    return {
+        "auc": auc,
+        "tpr": tpr_grid,
+        "precision": prec_grid,
+        "tp": tp[:, k],
+        "fp": fp[:, k],
+        "pos": pos,
+    }
+
+
+def bootstrap_metrics(
+    y_true: np.ndarray,
+    proba: np.ndarray,
+    n_boot: int = 2000,
+    seed: int = 42,
+    n_jobs: int | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    Bootstrap the held-out predictions n_boot times.
+    Returns per-resample AUC, TPR on FPR_GRID, precision on RECALL_GRID, and TP/FP/positives
+    at THRESHOLDS, each with one row per resample.
+    """
+    y_true = np.asarray(y_true).astype(int)
+    proba = np.asarray(proba, dtype=float)
+
+    cells = len(y_true) * n_boot
+    if cells <= CHUNK_CELLS:
+        return _bootstrap_chunk(y_true, proba, n_boot, seed)
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    parallel = n_jobs > 1 and cells >= PARALLEL_MIN_CELLS
+    n_chunks = max(n_jobs if parallel else 1, -(-cells // CHUNK_CELLS))
+    sizes = [len(c) for c in np.array_split(np.arange(n_boot), n_chunks) if len(c)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = ([y_true] * len(sizes), [proba] * len(sizes), sizes, seeds)
+    if parallel:
+        # spawn: forking the Streamlit server process with running OpenMP/BLAS threads can deadlock
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(sizes)), mp_context=multiprocessing.get_context("spawn")) as pool:
+            parts = list(pool.map(_bootstrap_chunk, *args))
+    else:
+        parts = list(map(_bootstrap_chunk, *args))
+    return {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+
+
+@timed("cached_bootstrap", cached=True)
+@st.cache_data(show_spinner="Bootstrapping confidence intervals...")
+def cached_bootstrap(version: str, _y_true: np.ndarray, _proba: np.ndarray, n_boot: int = 2000) -> dict[str, np.ndarray]:
+    cache_miss("cached_bootstrap")
+    # Arrays are excluded from hashing; the model version identifies them
+    return bootstrap_metrics(_y_true, _proba, n_boot=n_boot)
+
+
+def confidence_band(samples: np.ndarray, level: float = 0.95) -> tuple[np.ndarray, np.ndarray]:
+    alpha = (1.0 - level) / 2.0
+    lo, hi = np.nanquantile(samples, [alpha, 1.0 - alpha], axis=0)
+    return lo, hi
+
+
+def profit_band(
+    boot: dict[str, np.ndarray],
+    value_per_churn: float,
+    offer_cost: float,
+    save_rate: float,
+    level: float = 0.95,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Confidence band of expected profit at each of THRESHOLDS."""
+    profit = boot["tp"] * value_per_churn * save_rate - (boot["tp"] + boot["fp"]) * offer_cost
+    return confidence_band(profit, level)
\ No newline at end of file
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+
+HOTSPOT_DIMS = ["Geography", "Gender", "AgeBand", "NumOfProducts", "HasCrCard", "IsActiveMember", "risk"]
+MEASURES = ["customers", "churned", "value_at_risk"]
+
+# Display labels for coded dimensions, in the "France | Not Active | 1P" style of the Pareto charts
+SEGMENT_LABELS = {
+    "IsActiveMember": lambda v: "Active" if v == 1 else "Not Active",
+    "HasCrCard": lambda v: "Card" if v == 1 else "No Card",
+    "NumOfProducts": lambda v: f"{v}P",
+    "AgeBand": lambda v: f"Age {v}",
+    "risk": lambda v: f"{v} risk",
+}
+
+# Above this many rows the cube is filled by worker processes, one row chunk each
+PARALLEL_MIN_ROWS = 2_000_000
+
+
+def _dim_labels(s: pd.Series) -> list:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return list(s.cat.categories)
+    return sorted(s.dropna().unique().tolist())
+
+
+def _partial_cube(columns: dict, labels: dict, exited: np.ndarray, var: np.ndarray, shape: tuple) -> np.ndarray:
+    codes = [pd.Categorical(columns[d], categories=labels[d]).codes for d in labels]
+    ok = np.all([c >= 0 for c in codes], axis=0)
+    flat = np.ravel_multi_index([c[ok] for c in codes], shape)
+    size = int(np.prod(shape))
+    cube = np.empty((len(MEASURES), size))
+    cube[0] = np.bincount(flat, minlength=size)
+    cube[1] = np.bincount(flat, weights=exited[ok], minlength=size)
+    cube[2] = np.bincount(flat, weights=var[ok], minlength=size)
+    return cube.reshape((len(MEASURES),) + shape)
+
+
+def build_cube(
+    df: pd.DataFrame,
+    dims: list[str] = HOTSPOT_DIMS,
+    p_col: str = "churn_proba",
+    value_col: str = "ValueProxy",
+    n_jobs: int | None = None,
+) -> dict:
+    """
+    Integer-code every dimension and aggregate customers, churned and value at risk
+    (ValueProxy x churn_proba) into one dense cube. Every segment combination is a marginal of it.
+    """
+    dims = [d for d in dims if d in df.columns]
+    labels = {d: _dim_labels(df[d]) for d in dims}
+    shape = tuple(len(labels[d]) for d in dims)
+
+    exited = df["Exited"].to_numpy(dtype=float)
+    if p_col in df.columns and value_col in df.columns:
+        var = np.nan_to_num(df[value_col].to_numpy(dtype=float) * df[p_col].to_numpy(dtype=float))
+    else:
+        var = np.zeros(len(df))
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs > 1 and len(df) >= PARALLEL_MIN_ROWS:
+        bounds = np.linspace(0, len(df), n_jobs + 1).astype(int)
+        parts = [slice(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+        # spawn: forking the Streamlit server process with running OpenMP/BLAS threads can deadlock
+        with ProcessPoolExecutor(max_workers=len(parts), mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [
+                pool.submit(
+                    _partial_cube,
+                    {d: df[d].to_numpy()[sl] for d in dims},
+                    labels,
+                    exited[sl],
+                    var[sl],
+                    shape,
+                )
+                for sl in parts
+            ]
+            cube = sum(f.result() for f in futures)
+    else:
+        cube = _partial_cube({d: df[d].to_numpy() for d in dims}, labels, exited, var, shape)
+
+    return {"dims": dims, "labels": labels, "cube": cube}
+
+
+def segment_table(cube: dict, combo: tuple[str, ...]) -> pd.DataFrame:
+    """All segments of one dimension combination (a partition of the customers)."""
+    dims = cube["dims"]
+    combo = tuple(sorted(combo, key=dims.index))
+    keep = [dims.index(d) for d in combo]
+    drop = tuple(i + 1 for i in range(len(dims)) if i not in keep)
+    agg = cube["cube"].sum(axis=drop) if drop else cube["cube"]
+    agg = agg.reshape(len(MEASURES), -1)
+
+    grid = pd.MultiIndex.from_product([cube["labels"][d] for d in combo], names=list(combo)).to_frame(index=False)
+    out = grid.assign(**{m: agg[i] for i, m in enumerate(MEASURES)})
+    out = out[out["customers"] > 0].reset_index(drop=True)
+    out["segment"] = [
+        " | ".join(SEGMENT_LABELS.get(d, str)(v) for d, v in zip(combo, row))
+        for row in out[list(combo)].itertuples(index=False, name=None)
+    ]
+    out["depth"] = len(combo)
+    return out
+
+
+def mine_hotspots(
+    cube: dict,
+    max_depth: int = 3,
+    min_support: int = 50,
+    min_lift: float = 1.2,
+    rank_by: str = "churned",
+) -> pd.DataFrame:
+    """
+    Rank segments of every dimension combination up to max_depth.
+    A segment is kept when it has at least min_support customers and its churn rate is at least
+    min_lift x the overall rate. Support is anti-monotone, so a combination is only expanded
+    from parents that still have a segment above min_support.
+    """
+    total = cube["cube"].reshape(len(MEASURES), -1).sum(axis=1)
+    n_all, churned_all, var_all = total
+    base_rate = churned_all / n_all if n_all else 0.0
+
+    dims = cube["dims"]
+    alive = {(): True}
+    frames = []
+    for depth in range(1, max_depth + 1):
+        for combo in combinations(dims, depth):
+            if not all(alive.get(sub, False) for sub in combinations(combo, depth - 1)):
+                continue
+            seg = segment_table(cube, combo)
+            seg = seg[seg["customers"] >= min_support]
+            alive[combo] = not seg.empty
+            if seg.empty:
+                continue
+            seg = seg.assign(churn_rate=seg["churned"] / seg["customers"])
+            seg = seg.assign(lift=seg["churn_rate"] / base_rate if base_rate else np.nan)
+            frames.append(seg[seg["lift"] >= min_lift])
+
+    cols = ["segment", "depth", "customers", "churned", "churn_rate", "lift", "share_of_churn", "value_at_risk", "share_of_value_at_risk"]
+    if not frames:
+        return pd.DataFrame(columns=cols)
+    out = pd.concat(frames, ignore_index=True)
+    out["share_of_churn"] = out["churned"] / churned_all if churned_all else 0.0
+    out["share_of_value_at_risk"] = out["value_at_risk"] / var_all if var_all else 0.0
+    return out[cols].sort_values(rank_by, ascending=False).reset_index(drop=True)
\ No newline at end of file
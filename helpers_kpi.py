@@ -1,7 +1,11 @@
 import streamlit as st
 
+from helpers_perf import capture
+
 
 def kpi_card(label: str, value: str, border_color: str = "#0066CC", delta_text: str | None = None, delta_color: str = "#1A1A1A") -> None:
+    capture({"type": "kpi", "label": label, "value": value, "border_color": border_color,
+             "delta_text": delta_text, "delta_color": delta_color})
     st.markdown(
         f"""
         <div class="kpi-card" style="border-left-color:{border_color};">
@@ -11,4 +15,10 @@ def kpi_card(label: str, value: str, border_color: str = "#0066CC", delta_text:
         </div>
         """,
         unsafe_allow_html=True,
-    )
\ No newline at end of file
+    )
+
+
+def metric(container, label: str, value: str, delta: str | None = None, delta_color: str = "normal") -> None:
+    """container.metric (st or a column) that is also recorded for pre-rendered snapshots."""
+    capture({"type": "metric", "label": label, "value": value, "delta": delta, "delta_color": delta_color})
+    container.metric(label, value, delta=delta, delta_color=delta_color)
\ No newline at end of file
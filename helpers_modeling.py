@@ -1,15 +1,24 @@
 from __future__ import annotations
 
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 
+from sklearn.metrics import roc_auc_score
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import roc_auc_score
 from imblearn.over_sampling import SMOTE
 from xgboost import XGBClassifier
 import shap
 
+from helpers_evaluation import evaluation_report
+from helpers_perf import timed
+
 
 FEATURES = [
     "CreditScore", "Age", "Tenure", "Balance", "NumOfProducts",
@@ -18,27 +27,83 @@ FEATURES = [
 ]
 
 
-def one_hot(df: pd.DataFrame) -> pd.DataFrame:
+def one_hot(df: pd.DataFrame, drop_first: bool = True) -> pd.DataFrame:
     X = df[FEATURES].copy()
-    X = pd.get_dummies(X, columns=["Geography", "Gender"], drop_first=True)
+    X = pd.get_dummies(X, columns=["Geography", "Gender"], drop_first=drop_first)
     return X
 
 
-def train_model(df: pd.DataFrame, seed: int = 42):
-    X = one_hot(df)
-    y = df["Exited"].astype(int).values
+# Segmentations available for per-segment models: column -> row labels
+SEGMENT_BY = {
+    "Geography": lambda df: df["Geography"].astype(str).to_numpy(),
+    "NumOfProducts": lambda df: np.where(df["NumOfProducts"] >= 3, "3+", df["NumOfProducts"].astype(int).astype(str)),
+}
+# Segments smaller than this in the training split (or with too few churners for SMOTE) use the global model
+MIN_SEGMENT_ROWS = 500
+MIN_SEGMENT_MINORITY = 20
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=seed, stratify=y
-    )
 
-    # Keep with_mean=False to avoid issues with sparse-ish matrices
-    scaler = StandardScaler(with_mean=False)
-    X_train_s = scaler.fit_transform(X_train)
-    X_test_s = scaler.transform(X_test)
+def segment_labels(df: pd.DataFrame, segment_by: str) -> np.ndarray:
+    return np.asarray(SEGMENT_BY[segment_by](df))
+
+
+class SegmentedModel:
+    """
+    A global model plus one model per segment. Rows of segments without their own model
+    are scored by the global model.
+    """
+
+    def __init__(self, segment_by: str, global_model, models: dict):
+        self.segment_by = segment_by
+        self.global_model = global_model
+        self.models = models
+
+    def route(self, labels: np.ndarray):
+        """Yield (segment or None for the global model, row positions), one group per serving model."""
+        # Group rows by segment with one stable sort instead of one mask per segment
+        codes = pd.Categorical(labels, categories=list(self.models)).codes
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(-1, len(self.models) + 1))
+        for key, a, b in zip([None, *self.models], bounds[:-1], bounds[1:]):
+            if b > a:
+                yield key, order[a:b]
 
+    def estimator(self, key):
+        return self.global_model if key is None else self.models[key]
+
+    def predict_routed(self, Xs: np.ndarray, labels: np.ndarray) -> np.ndarray:
+        out = np.empty(len(labels))
+        for key, rows in self.route(labels):
+            out[rows] = self.estimator(key).predict_proba(Xs[rows])[:, 1]
+        return out
+
+
+class SegmentedExplainer:
+    """One TreeExplainer per serving model of a SegmentedModel, routed the same way as predictions."""
+
+    def __init__(self, model: SegmentedModel):
+        self.model = model
+        self.explainers = {key: shap.TreeExplainer(model.estimator(key)) for key in [None, *model.models]}
+
+    def explain(self, Xs: np.ndarray, labels: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        sv = np.empty(Xs.shape, dtype=float)
+        base = np.empty(len(labels))
+        for key, rows in self.model.route(labels):
+            ex = self.explainers[key]
+            sv[rows] = np.asarray(ex.shap_values(Xs[rows]))
+            base[rows] = float(ex.expected_value)
+        return sv, base
+
+
+def build_explainer(model):
+    if isinstance(model, SegmentedModel):
+        return SegmentedExplainer(model)
+    return shap.TreeExplainer(model)
+
+
+def _fit_classifier(X: np.ndarray, y: np.ndarray, seed: int, n_threads: int | None = None) -> XGBClassifier:
     sm = SMOTE(random_state=seed)
-    X_res, y_res = sm.fit_resample(X_train_s, y_train)
+    X_res, y_res = sm.fit_resample(X, y)
 
     model = XGBClassifier(
         n_estimators=400,
@@ -49,43 +114,179 @@ def train_model(df: pd.DataFrame, seed: int = 42):
         reg_lambda=1.0,
         random_state=seed,
         eval_metric="logloss",
+        n_jobs=n_threads,
     )
     model.fit(X_res, y_res)
+    return model
 
-    proba = model.predict_proba(X_test_s)[:, 1]
-    auc = roc_auc_score(y_test, proba)
 
-    explainer = shap.TreeExplainer(model)
+def _fit_parallel(jobs: dict, seed: int, n_jobs: int | None = None) -> dict:
+    """Fit one classifier per (X, y) job; several jobs share the cores across a process pool."""
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(jobs))
+    if n_jobs <= 1:
+        return {key: _fit_classifier(X, y, seed) for key, (X, y) in jobs.items()}
+    n_threads = max(1, (os.cpu_count() or 1) // n_jobs)
+    # spawn: forking the Streamlit server process with running OpenMP/BLAS threads can deadlock
+    with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {key: pool.submit(_fit_classifier, X, y, seed, n_threads) for key, (X, y) in jobs.items()}
+        return {key: f.result() for key, f in futures.items()}
 
-    feature_cols = list(X.columns)
-    return model, scaler, feature_cols, auc, (X_test_s, y_test), explainer
 
+def segment_comparison(y_true: np.ndarray, labels: np.ndarray, global_proba: np.ndarray, segment_proba: np.ndarray, models: dict) -> pd.DataFrame:
+    """Held-out AUC of the global vs the per-segment models, per segment and overall."""
+    def auc(y, p):
+        return float(roc_auc_score(y, p)) if len(np.unique(y)) == 2 else np.nan
 
-def predict_proba(model, scaler, feature_columns: list[str], df_row: pd.DataFrame) -> float:
-    X = one_hot(df_row)
+    rows = []
+    for seg in sorted(pd.unique(labels)):
+        m = labels == seg
+        rows.append({
+            "segment": seg, "rows": int(m.sum()), "churn_rate": float(y_true[m].mean()),
+            "own_model": seg in models,
+            "global_auc": auc(y_true[m], global_proba[m]), "segmented_auc": auc(y_true[m], segment_proba[m]),
+        })
+    rows.append({
+        "segment": "All", "rows": len(y_true), "churn_rate": float(y_true.mean()), "own_model": bool(models),
+        "global_auc": auc(y_true, global_proba), "segmented_auc": auc(y_true, segment_proba),
+    })
+    return pd.DataFrame(rows)
 
-    # align columns
-    for col in feature_columns:
-        if col not in X.columns:
-            X[col] = 0
-    X = X[feature_columns]
 
-    Xs = scaler.transform(X)
-    return float(model.predict_proba(Xs)[:, 1][0])
+@timed("train_model")
+def train_model(df: pd.DataFrame, seed: int = 42, segment_by: str | None = None, n_jobs: int | None = None):
+    """
+    Fit the churn model. With segment_by (a SEGMENT_BY key) one model per segment is fitted alongside
+    the global one in a process pool. The candidates are fitted on 80% of the training split and the
+    segment models kept only if they beat the global model on the remaining 20% (validation); the
+    models are then refitted on the whole training split. The test set is only used for reporting,
+    and the comparison is stored in report["segments"].
+    """
+    X = one_hot(df)
+    y = df["Exited"].astype(int).values
 
+    train_idx, test_idx = train_test_split(
+        np.arange(len(df)), test_size=0.2, random_state=seed, stratify=y
+    )
+    X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+    y_train, y_test = y[train_idx], y[test_idx]
+
+    # Keep with_mean=False to avoid issues with sparse-ish matrices
+    scaler = StandardScaler(with_mean=False)
+    X_train_s = scaler.fit_transform(X_train)
+    X_test_s = scaler.transform(X_test)
+
+    if not segment_by:
+        model = _fit_classifier(X_train_s, y_train, seed)
+        # Held-out predictions are scored once and kept with the model as its evaluation report
+        report = evaluation_report(y_test, model.predict_proba(X_test_s)[:, 1])
+        report["segments"] = None
+        return model, scaler, list(X.columns), report["auc"], report, build_explainer(model)
+
+    labels = segment_labels(df, segment_by)
+    fit_pos, val_pos = train_test_split(
+        np.arange(len(train_idx)), test_size=0.2, random_state=seed, stratify=y_train
+    )
+    X_fit, y_fit, fit_labels = X_train_s[fit_pos], y_train[fit_pos], labels[train_idx][fit_pos]
+
+    def segment_jobs(X_part, y_part, part_labels) -> dict:
+        jobs = {None: (X_part, y_part)}
+        for seg in pd.unique(part_labels):
+            m = part_labels == seg
+            if m.sum() >= MIN_SEGMENT_ROWS and np.bincount(y_part[m], minlength=2).min() >= MIN_SEGMENT_MINORITY:
+                jobs[seg] = (X_part[m], y_part[m])
+        return jobs
+
+    models = _fit_parallel(segment_jobs(X_fit, y_fit, fit_labels), seed, n_jobs)
+    candidate = SegmentedModel(segment_by, models.pop(None), models)
+
+    # Choose on validation rows only
+    X_val, y_val, val_labels = X_train_s[val_pos], y_train[val_pos], labels[train_idx][val_pos]
+    val_global = float(roc_auc_score(y_val, candidate.global_model.predict_proba(X_val)[:, 1]))
+    val_segmented = float(roc_auc_score(y_val, candidate.predict_routed(X_val, val_labels)))
+    chosen = bool(models) and val_segmented > val_global
+
+    # Refit on the whole training split so the served model sees as much data as with segment_by=None.
+    # The segment models are refitted either way, which keeps the test comparison like-for-like.
+    train_labels = labels[train_idx]
+    refit = _fit_parallel(
+        {k: v for k, v in segment_jobs(X_train_s, y_train, train_labels).items() if k is None or k in models},
+        seed, n_jobs,
+    )
+    global_model = refit.pop(None)
+    models = refit
+    segmented = SegmentedModel(segment_by, global_model, models)
+
+    # Both candidates were fixed before the test rows were touched, so this comparison is unbiased
+    test_labels = labels[test_idx]
+    global_proba = global_model.predict_proba(X_test_s)[:, 1]
+    seg_proba = segmented.predict_routed(X_test_s, test_labels)
+    table = segment_comparison(y_test, test_labels, global_proba, seg_proba, models)
+
+    model, proba = (segmented, seg_proba) if chosen else (global_model, global_proba)
+    report = evaluation_report(y_test, proba)
+    report["segments"] = {
+        "by": segment_by, "chosen": chosen, "table": table,
+        "val_global_auc": val_global, "val_segmented_auc": val_segmented,
+    }
+    return model, scaler, list(X.columns), report["auc"], report, build_explainer(model)
 
-def predict_batch(model, scaler, feature_columns: list[str], df: pd.DataFrame) -> np.ndarray:
-    X = one_hot(df)
 
-    for col in feature_columns:
-        if col not in X.columns:
-            X[col] = 0
-    X = X[feature_columns]
+def prepare_features(scaler, feature_columns: list[str], df: pd.DataFrame) -> np.ndarray:
+    # Full dummies reindexed to the training columns, so a row's encoding never depends on
+    # which other rows (or levels) are in the same frame; the training baseline level maps to all zeros
+    X = one_hot(df, drop_first=False).reindex(columns=feature_columns, fill_value=0)
+    return scaler.transform(X)
 
-    Xs = scaler.transform(X)
+
+def explain_rows(explainer, Xs: np.ndarray, df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """SHAP values and base values per row, from the explainer of the model that scores each row."""
+    if isinstance(explainer, SegmentedExplainer):
+        return explainer.explain(Xs, segment_labels(df, explainer.model.segment_by))
+    sv = np.asarray(explainer.shap_values(Xs))
+    return sv, np.full(len(Xs), float(explainer.expected_value))
+
+
+def model_proba(model, Xs: np.ndarray, df: pd.DataFrame) -> np.ndarray:
+    """Churn probability from prepared features; segmented models route rows by their segment in df."""
+    if isinstance(model, SegmentedModel):
+        return model.predict_routed(Xs, segment_labels(df, model.segment_by))
     return model.predict_proba(Xs)[:, 1]
 
 
+@timed("predict_proba")
+def predict_proba(model, scaler, feature_columns: list[str], df_row: pd.DataFrame) -> float:
+    Xs = prepare_features(scaler, feature_columns, df_row)
+    return float(model_proba(model, Xs, df_row)[0])
+
+
+@timed("predict_batch")
+def predict_batch(model, scaler, feature_columns: list[str], df: pd.DataFrame) -> np.ndarray:
+    Xs = prepare_features(scaler, feature_columns, df)
+    return model_proba(model, Xs, df)
+
+
+def save_bundle(bundle, path: str | Path) -> Path:
+    """Persist a train_model bundle. The SHAP explainer is rebuilt on load rather than pickled."""
+    model, scaler, feature_cols, auc, report, explainer = bundle
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as fh:
+        pickle.dump((model, scaler, feature_cols, auc, report), fh)
+    return path
+
+
+def load_bundle(path: str | Path):
+    with open(path, "rb") as fh:
+        model, scaler, feature_cols, auc, report = pickle.load(fh)
+    return model, scaler, feature_cols, auc, report, build_explainer(model)
+
+
+def risk_levels(p: np.ndarray) -> np.ndarray:
+    """Vectorized risk_level for a whole column of probabilities."""
+    p = np.asarray(p, dtype=float)
+    return np.where(p >= 0.70, "High", np.where(p >= 0.40, "Medium", "Low"))
+
+
 def risk_level(p: float) -> str:
     if p >= 0.70:
         return "High"
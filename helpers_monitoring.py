@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+
+
+# Fixed bin edges make histograms from different chunks/snapshots directly mergeable.
+# Values outside the range land in the first/last (open-ended) bins.
+NUMERIC_BINS = {
+    "CreditScore": np.arange(300, 901, 10, dtype=float),
+    "Age": np.arange(18, 101, 1, dtype=float),
+    "Balance": np.arange(0, 260_001, 5_000, dtype=float),
+    "EstimatedSalary": np.arange(0, 200_001, 5_000, dtype=float),
+    "churn_proba": np.linspace(0.0, 1.0, 51),
+}
+CATEGORICAL_COLS = ["Geography", "Gender", "NumOfProducts"]
+
+PSI_EPS = 1e-4
+
+
+def empty_sketch() -> dict:
+    return {
+        "n": 0,
+        "hist": {c: np.zeros(len(edges) + 1, dtype=np.int64) for c, edges in NUMERIC_BINS.items()},
+        "freq": {c: {} for c in CATEGORICAL_COLS},
+    }
+
+
+def update_sketch(sketch: dict, chunk: pd.DataFrame) -> dict:
+    """Fold one chunk of load_data/iter_data output into the sketch (in place)."""
+    sketch["n"] += len(chunk)
+    for c, edges in NUMERIC_BINS.items():
+        if c not in chunk.columns:
+            continue
+        x = chunk[c].to_numpy(dtype=float)
+        x = x[~np.isnan(x)]
+        sketch["hist"][c] += np.bincount(np.searchsorted(edges, x, side="right"), minlength=len(edges) + 1)
+    for c in CATEGORICAL_COLS:
+        if c not in chunk.columns:
+            continue
+        freq = sketch["freq"][c]
+        for k, v in chunk[c].astype(str).value_counts().items():
+            freq[k] = freq.get(k, 0) + int(v)
+    return sketch
+
+
+def merge_sketches(a: dict, b: dict) -> dict:
+    out = empty_sketch()
+    out["n"] = a["n"] + b["n"]
+    for c in NUMERIC_BINS:
+        out["hist"][c] = a["hist"][c] + b["hist"][c]
+    for c in CATEGORICAL_COLS:
+        freq = dict(a["freq"][c])
+        for k, v in b["freq"][c].items():
+            freq[k] = freq.get(k, 0) + v
+        out["freq"][c] = freq
+    return out
+
+
+def build_sketch(chunks) -> dict:
+    """One streaming pass over an iterable of frames (e.g. iter_data)."""
+    sketch = empty_sketch()
+    for chunk in chunks:
+        update_sketch(sketch, chunk)
+    return sketch
+
+
+def sketch_to_json(sketch: dict) -> str:
+    return json.dumps({
+        "n": sketch["n"],
+        "hist": {c: h.tolist() for c, h in sketch["hist"].items()},
+        "freq": sketch["freq"],
+    })
+
+
+def sketch_from_json(text: str) -> dict:
+    raw = json.loads(text)
+    sketch = empty_sketch()
+    sketch["n"] = int(raw["n"])
+    for c, h in raw["hist"].items():
+        if c in sketch["hist"] and len(h) == len(sketch["hist"][c]):
+            sketch["hist"][c] = np.asarray(h, dtype=np.int64)
+    for c, f in raw["freq"].items():
+        sketch["freq"][c] = {k: int(v) for k, v in f.items()}
+    return sketch
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Population Stability Index between two aligned count vectors."""
+    e = expected / max(expected.sum(), 1)
+    a = actual / max(actual.sum(), 1)
+    e = np.clip(e, PSI_EPS, None)
+    a = np.clip(a, PSI_EPS, None)
+    return float(((a - e) * np.log(a / e)).sum())
+
+
+def ks_from_hist(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Kolmogorov–Smirnov statistic evaluated at the shared bin edges."""
+    if expected.sum() == 0 or actual.sum() == 0:
+        return 0.0
+    ce = np.cumsum(expected) / expected.sum()
+    ca = np.cumsum(actual) / actual.sum()
+    return float(np.abs(ce - ca).max())
+
+
+def hist_quantiles(sketch: dict, col: str, qs=(0.05, 0.25, 0.5, 0.75, 0.95)) -> np.ndarray:
+    """Approximate quantiles from a sketch histogram (bin right edges)."""
+    counts = sketch["hist"][col]
+    edges = NUMERIC_BINS[col]
+    if counts.sum() == 0:
+        return np.full(len(qs), np.nan)
+    cdf = np.cumsum(counts) / counts.sum()
+    idx = np.searchsorted(cdf, np.asarray(qs), side="left")
+    return np.append(edges, edges[-1])[idx]
+
+
+def drift_level(psi_value: float) -> str:
+    if psi_value >= 0.25:
+        return "High"
+    if psi_value >= 0.10:
+        return "Medium"
+    return "Low"
+
+
+def compare_sketches(baseline: dict, current: dict) -> pd.DataFrame:
+    """PSI (and KS for numeric features) of current vs baseline, one row per feature."""
+    rows = []
+    for c in NUMERIC_BINS:
+        e, a = baseline["hist"][c], current["hist"][c]
+        if e.sum() == 0 or a.sum() == 0:
+            continue
+        p = psi(e, a)
+        rows.append({"Feature": c, "Type": "numeric", "PSI": p, "KS": ks_from_hist(e, a), "Drift": drift_level(p)})
+    for c in CATEGORICAL_COLS:
+        cats = sorted(set(baseline["freq"][c]) | set(current["freq"][c]))
+        if not cats:
+            continue
+        e = np.array([baseline["freq"][c].get(k, 0) for k in cats], dtype=float)
+        a = np.array([current["freq"][c].get(k, 0) for k in cats], dtype=float)
+        p = psi(e, a)
+        rows.append({"Feature": c, "Type": "categorical", "PSI": p, "KS": np.nan, "Drift": drift_level(p)})
+    return pd.DataFrame(rows, columns=["Feature", "Type", "PSI", "KS", "Drift"])
\ No newline at end of file
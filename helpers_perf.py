@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+
+MAX_RUNS = 50
+
+# Streamlit runs each session's script in its own thread, so the current rerun's
+# record is thread-local. When diagnostics are off it is None and every hook is a no-op.
+_local = threading.local()
+
+# Output capture for pre-rendering (see helpers_snapshots). Process-wide on purpose:
+# the page under capture runs in a script thread of its own.
+_capture: list | None = None
+
+
+def _current():
+    return getattr(_local, "run", None)
+
+
+def start_run(page: str) -> None:
+    """Call once per page, after set_page_config; adds the sidebar toggle."""
+    enabled = st.sidebar.checkbox("Performance diagnostics", value=st.session_state.get("perf_enabled", False))
+    st.session_state["perf_enabled"] = enabled
+    _local.run = (
+        {"page": page, "started": time.time(), "t0": time.perf_counter(), "stages": [], "cache": {}, "payloads": []}
+        if enabled else None
+    )
+
+
+def finish_run() -> None:
+    """Store the rerun's record in the session and show it in the sidebar."""
+    run = _current()
+    _local.run = None
+    if run is None:
+        return
+    run["total_seconds"] = time.perf_counter() - run.pop("t0")
+    runs = st.session_state.setdefault("perf_runs", [])
+    runs.append(run)
+    del runs[:-MAX_RUNS]
+
+    with st.sidebar.expander(f"Diagnostics: {run['total_seconds']:.2f}s this rerun", expanded=False):
+        st.dataframe(stage_table([run]), use_container_width=True)
+
+
+@contextmanager
+def stage(name: str):
+    run = _current()
+    if run is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        run["stages"].append({"stage": name, "seconds": time.perf_counter() - t0})
+
+
+def timed(name: str, cached: bool = False):
+    """Decorator form of stage(). With cached=True calls are counted for hit/miss reporting (see cache_miss)."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            run = _current()
+            if run is None:
+                return fn(*args, **kwargs)
+            if cached:
+                run["cache"].setdefault(name, {"calls": 0, "misses": 0})["calls"] += 1
+            with stage(name):
+                return fn(*args, **kwargs)
+
+        # Keep st.cache_data's .clear() reachable through the wrapper
+        if hasattr(fn, "clear"):
+            wrapper.clear = fn.clear
+        return wrapper
+    return decorate
+
+
+def cache_miss(name: str) -> None:
+    """Call from inside a cached function body: it only runs on a cache miss."""
+    run = _current()
+    if run is not None:
+        run["cache"].setdefault(name, {"calls": 0, "misses": 0})["misses"] += 1
+
+
+def start_capture() -> None:
+    global _capture
+    _capture = []
+
+
+def stop_capture() -> list:
+    global _capture
+    items, _capture = _capture or [], None
+    return items
+
+
+def capture(item: dict) -> None:
+    if _capture is not None:
+        _capture.append(item)
+
+
+def plotly_chart(fig, **kwargs):
+    """st.plotly_chart with serialization time and payload size recorded when diagnostics are on."""
+    if _capture is not None:
+        _capture.append({"type": "chart", "figure": fig.to_json()})
+    run = _current()
+    if run is None:
+        return st.plotly_chart(fig, **kwargs)
+    title = fig.layout.title.text or "untitled"
+    with stage(f"serialize: {title}"):
+        payload = fig.to_json()
+    run["payloads"].append({"chart": title, "bytes": len(payload)})
+    with stage(f"plotly_chart: {title}"):
+        return st.plotly_chart(fig, **kwargs)
+
+
+def stage_table(runs: list[dict]) -> pd.DataFrame:
+    rows = [
+        {"page": r["page"], "stage": s["stage"], "seconds": s["seconds"]}
+        for r in runs for s in r["stages"]
+    ]
+    if not rows:
+        return pd.DataFrame(columns=["page", "stage", "calls", "total_s", "mean_s", "max_s"])
+    df = pd.DataFrame(rows)
+    return (
+        df.groupby(["page", "stage"])["seconds"]
+        .agg(calls="size", total_s="sum", mean_s="mean", max_s="max")
+        .reset_index()
+        .sort_values("total_s", ascending=False)
+    )
+
+
+def cache_table(runs: list[dict]) -> pd.DataFrame:
+    rows = [
+        {"function": name, "calls": c["calls"], "misses": min(c["misses"], c["calls"])}
+        for r in runs for name, c in r["cache"].items()
+    ]
+    if not rows:
+        return pd.DataFrame(columns=["function", "calls", "misses", "hits"])
+    df = pd.DataFrame(rows).groupby("function").sum().reset_index()
+    df["hits"] = df["calls"] - df["misses"]
+    return df
+
+
+def export_json(runs: list[dict]) -> str:
+    return json.dumps(runs, indent=2, default=float)
\ No newline at end of file
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from helpers_data import DEFAULT_FILTERS, get_data_path
+from helpers_kpi import kpi_card
+from helpers_modeling import SEGMENT_BY, train_model, save_bundle, load_bundle
+
+
+BUNDLE_PATH = Path("models") / "churn_bundle.pkl"
+# Environment variable naming a helpers_modeling.SEGMENT_BY key to train per-segment models for the dashboard
+SEGMENT_BY_ENV = "CHURN_SEGMENT_BY"
+SNAPSHOT_DIR = Path("snapshots")
+PRESETS_PATH = Path("presets.json")
+
+# Pages that can be pre-rendered; pages without sidebar filters only get the default snapshot
+SNAPSHOT_PAGES = {
+    "Overview": ("1_Overview.py", True),
+    "Customer Analysis": ("2_Customer_Analysis.py", True),
+    "ML Predictions": ("3_ML_Predictions.py", True),
+    "Model Performance": ("4_Model_Performance.py", False),
+    "Business Impact": ("5_Business_Impact.py", True),
+}
+
+
+@st.cache_data(show_spinner=False)
+def _file_digest(path: str, mtime: float) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:16]
+
+
+def dataset_version(path: str | Path | None = None) -> str:
+    path = Path(path or get_data_path())
+    return _file_digest(str(path), path.stat().st_mtime)
+
+
+def _segment_by(report: dict) -> str | None:
+    return (report.get("segments") or {}).get("by")
+
+
+def model_segment_by() -> str | None:
+    """Segmentation for the dashboard model, read from CHURN_SEGMENT_BY on every call; unset means one global model."""
+    value = os.environ.get(SEGMENT_BY_ENV) or None
+    if value is not None and value not in SEGMENT_BY:
+        raise ValueError(f"{SEGMENT_BY_ENV}={value!r}; expected one of {list(SEGMENT_BY)}")
+    return value
+
+
+def load_or_train_bundle(df: pd.DataFrame, version: str, segment_by: str | None = None):
+    """Reuse the saved bundle when it was trained on this dataset and segmentation, otherwise train and save one."""
+    if BUNDLE_PATH.exists():
+        bundle = load_bundle(BUNDLE_PATH)
+        if bundle[4].get("dataset") == version and _segment_by(bundle[4]) == segment_by:
+            return bundle
+    bundle = train_model(df, segment_by=segment_by)
+    bundle[4]["dataset"] = version
+    try:
+        save_bundle(bundle, BUNDLE_PATH)
+    except OSError:
+        # Read-only deployments just keep the model in the session
+        pass
+    return bundle
+
+
+def get_model_bundle(df: pd.DataFrame):
+    if "model_bundle" not in st.session_state:
+        with st.spinner("Loading model (trains on first run only)..."):
+            st.session_state["model_bundle"] = load_or_train_bundle(df, dataset_version(), model_segment_by())
+    return st.session_state["model_bundle"]
+
+
+def filter_key(filters: dict | None) -> str:
+    if filters is None:
+        return "default"
+    return json.dumps([
+        sorted(str(g) for g in filters["geos"]),
+        [int(a) for a in filters["age_range"]],
+        sorted(int(p) for p in filters["products"]),
+        filters["active_member"],
+    ])
+
+
+def load_presets() -> list[dict]:
+    """Default sidebar state plus the saved presets in presets.json."""
+    presets = [dict(DEFAULT_FILTERS, name="Default")]
+    if PRESETS_PATH.exists():
+        for p in json.loads(PRESETS_PATH.read_text()):
+            presets.append({**DEFAULT_FILTERS, **p, "age_range": tuple(p.get("age_range", DEFAULT_FILTERS["age_range"]))})
+    return presets
+
+
+def snapshot_path(dataset: str, model: str) -> Path:
+    return SNAPSHOT_DIR / f"{dataset}_{model}.json"
+
+
+@st.cache_resource(show_spinner=False)
+def _load_store(path: str, mtime: float) -> dict:
+    return json.loads(Path(path).read_text())
+
+
+def _find_store(model_version: str | None) -> dict | None:
+    dataset = dataset_version()
+    if model_version is not None:
+        path = snapshot_path(dataset, model_version)
+        candidates = [path] if path.exists() else []
+    else:
+        # Pages that do not use the model accept snapshots rendered with any model
+        candidates = sorted(SNAPSHOT_DIR.glob(f"{dataset}_*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    if not candidates:
+        return None
+    return _load_store(str(candidates[0]), candidates[0].stat().st_mtime)
+
+
+def render_items(items: list[dict]) -> None:
+    """Replay captured KPI cards, metrics and charts. Tables, text, subheaders and in-page controls are not captured."""
+    i = 0
+    while i < len(items):
+        kind = items[i]["type"]
+        if kind == "chart":
+            st.plotly_chart(json.loads(items[i]["figure"]), use_container_width=True)
+            i += 1
+            continue
+        # Consecutive KPI cards / metrics were laid out as one row of columns
+        j = i
+        while j < len(items) and items[j]["type"] == kind:
+            j += 1
+        for col, item in zip(st.columns(j - i), items[i:j]):
+            with col:
+                if kind == "kpi":
+                    kpi_card(item["label"], item["value"], item["border_color"], item["delta_text"], item["delta_color"])
+                else:
+                    st.metric(item["label"], item["value"], delta=item["delta"], delta_color=item["delta_color"])
+        i = j
+
+
+def serve_snapshot(page: str, filters: dict | None, model_version: str | None = None) -> bool:
+    """Render the pre-rendered page for this filter state if one exists; False means compute live."""
+    # Opt-in for demos: a snapshot only carries the page's charts and KPIs
+    if not st.sidebar.checkbox("Projector mode (pre-rendered)", value=False, key="use_snapshots"):
+        return False
+    store = _find_store(model_version)
+    items = store["pages"].get(page, {}).get(filter_key(filters)) if store else None
+    if items is None:
+        return False
+    render_items(items)
+    st.caption(
+        "Pre-rendered snapshot: charts and KPIs only. Untick \"Projector mode\" in the sidebar for tables, "
+        "text and the in-page controls."
+    )
+    return True
\ No newline at end of file
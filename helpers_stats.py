@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from helpers_data import apply_filters
+
+
+# One cell per combination of the sidebar filter dimensions, so any filter state is a union of cells
+PARTITION_KEYS = ["Geography", "Age", "NumOfProducts", "IsActiveMember"]
+MOMENT_COLS = [
+    "CreditScore", "Age", "Tenure", "Balance", "NumOfProducts",
+    "HasCrCard", "IsActiveMember", "EstimatedSalary", "Exited",
+]
+
+
+def build_moments(
+    df: pd.DataFrame,
+    cols: list[str] = MOMENT_COLS,
+    counts: dict[str, pd.Series] | None = None,
+    shift: np.ndarray | None = None,
+) -> dict:
+    """
+    Per-cell count, sums and cross-products of `cols`, plus optional per-cell counts of boolean
+    series (e.g. {"HighRisk": churn_proba >= 0.7}). Values are shifted by `shift` (default: the
+    column means) before the products are taken, which keeps the variance arithmetic stable.
+    """
+    X = df[cols].to_numpy(dtype=float)
+    shift = np.nanmean(X, axis=0) if shift is None else np.asarray(shift, dtype=float)
+    if not np.all(np.isfinite(shift)):
+        shift = np.zeros(len(cols))
+    Xc = X - shift
+
+    codes, uniques = pd.MultiIndex.from_frame(df[PARTITION_KEYS].astype(object)).factorize()
+    keep = codes >= 0
+    if not keep.all():
+        # Rows with a missing key can never pass the filters
+        codes, Xc = codes[keep], Xc[keep]
+        counts = {name: np.asarray(flag)[keep] for name, flag in (counts or {}).items()}
+    n_cells = len(uniques)
+    k = len(cols)
+
+    n = np.bincount(codes, minlength=n_cells).astype(float)
+    s1 = np.empty((n_cells, k))
+    s2 = np.empty((n_cells, k, k))
+    for i in range(k):
+        s1[:, i] = np.bincount(codes, weights=Xc[:, i], minlength=n_cells)
+        for j in range(i, k):
+            s2[:, i, j] = s2[:, j, i] = np.bincount(codes, weights=Xc[:, i] * Xc[:, j], minlength=n_cells)
+
+    extra = {
+        name: np.bincount(codes, weights=np.asarray(flag, dtype=float), minlength=n_cells)
+        for name, flag in (counts or {}).items()
+    }
+    return {
+        "cols": list(cols),
+        # factorize() drops the level names, so name the key columns explicitly
+        "keys": uniques.to_frame(index=False, name=PARTITION_KEYS),
+        "shift": shift,
+        "n": n,
+        "s1": s1,
+        "s2": s2,
+        "counts": extra,
+    }
+
+
+def _reshift(m: dict, shift: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # Re-express sums about a new shift: x - s_new = (x - s_old) + d
+    d = m["shift"] - shift
+    n = m["n"][:, None]
+    s1 = m["s1"] + n * d
+    s2 = (
+        m["s2"]
+        + m["s1"][:, :, None] * d[None, None, :]
+        + d[None, :, None] * m["s1"][:, None, :]
+        + m["n"][:, None, None] * np.outer(d, d)[None]
+    )
+    return s1, s2
+
+
+def merge_moments(a: dict, b: dict) -> dict:
+    """Combine moments built from different partitions/chunks of the same columns."""
+    shift = a["shift"]
+    b_s1, b_s2 = _reshift(b, shift)
+    keys = pd.concat([a["keys"], b["keys"]], ignore_index=True)
+    codes, uniques = pd.MultiIndex.from_frame(keys.astype(object)).factorize()
+    n_cells = len(uniques)
+
+    def collapse(x_a, x_b):
+        x = np.concatenate([x_a, x_b])
+        out = np.zeros((n_cells,) + x.shape[1:])
+        np.add.at(out, codes, x)
+        return out
+
+    names = set(a["counts"]) & set(b["counts"])
+    return {
+        "cols": a["cols"],
+        "keys": uniques.to_frame(index=False, name=PARTITION_KEYS),
+        "shift": shift,
+        "n": collapse(a["n"], b["n"]),
+        "s1": collapse(a["s1"], b_s1),
+        "s2": collapse(a["s2"], b_s2),
+        "counts": {c: collapse(a["counts"][c], b["counts"][c]) for c in names},
+    }
+
+
+def select_cells(
+    m: dict,
+    geos: list[str],
+    age_range: tuple[int, int],
+    products: list[int],
+    active_member: str,
+) -> np.ndarray:
+    """Boolean mask over cells matching apply_filters for the same sidebar state."""
+    keys = m["keys"]
+    mask = np.ones(len(keys), dtype=bool)
+    if geos:
+        mask &= keys["Geography"].isin(geos).to_numpy()
+    age = keys["Age"].astype(float).to_numpy()
+    mask &= (age >= age_range[0]) & (age <= age_range[1])
+    if products:
+        mask &= keys["NumOfProducts"].isin(products).to_numpy()
+    if active_member != "All":
+        target = 1 if active_member == "Active" else 0
+        mask &= (keys["IsActiveMember"] == target).to_numpy()
+    return mask
+
+
+def summarize(m: dict, mask: np.ndarray | None = None) -> dict:
+    """Merge the selected cells into count, means, covariance/correlation and summed counts."""
+    if mask is None:
+        mask = np.ones(len(m["n"]), dtype=bool)
+    cols = m["cols"]
+    n = float(m["n"][mask].sum())
+    s1 = m["s1"][mask].sum(axis=0)
+    s2 = m["s2"][mask].sum(axis=0)
+    counts = {name: float(c[mask].sum()) for name, c in m["counts"].items()}
+
+    if n == 0:
+        nan = np.full(len(cols), np.nan)
+        empty = pd.DataFrame(np.nan, index=cols, columns=cols)
+        return {"n": 0, "mean": pd.Series(nan, index=cols), "cov": empty, "corr": empty, "counts": counts}
+
+    mean = s1 / n
+    comoment = s2 - n * np.outer(mean, mean)
+    cov = comoment / (n - 1) if n > 1 else np.full_like(comoment, np.nan)
+    sd = np.sqrt(np.clip(np.diag(cov), 0, None))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov / np.outer(sd, sd)
+    np.fill_diagonal(corr, np.where(sd > 0, 1.0, np.nan))
+
+    return {
+        "n": int(round(n)),
+        "mean": pd.Series(mean + m["shift"], index=cols),
+        "cov": pd.DataFrame(cov, index=cols, columns=cols),
+        "corr": pd.DataFrame(np.clip(corr, -1.0, 1.0), index=cols, columns=cols),
+        "counts": counts,
+    }
+
+
+def check_moments(m: dict, df: pd.DataFrame, filters: dict) -> float:
+    """
+    Largest absolute gap between the merged moments and pandas on the filtered rows
+    (means and correlations); NaN in only one of the two counts as an infinite gap.
+    """
+    dff = apply_filters(df, **filters)
+    got = summarize(m, select_cells(m, **filters))
+    if got["n"] != len(dff):
+        return float("inf")
+    if not len(dff):
+        return 0.0
+    cols = m["cols"]
+    pairs = [
+        (got["mean"].to_numpy(), dff[cols].mean().to_numpy()),
+        (got["corr"].to_numpy(), dff[cols].corr().to_numpy()),
+    ]
+    gap = 0.0
+    for a, b in pairs:
+        both_nan = np.isnan(a) & np.isnan(b)
+        diff = np.where(both_nan, 0.0, np.abs(a - b))
+        gap = max(gap, float(np.nan_to_num(diff, nan=np.inf).max()))
+    return gap
\ No newline at end of file
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+RAW_COLUMNS = [
+    "CustomerID", "Surname", "CreditScore", "Geography", "Gender", "Age", "Tenure",
+    "Balance", "NumOfProducts", "HasCrCard", "IsActiveMember", "EstimatedSalary", "Exited",
+]
+
+# Kernel bandwidth as a share of each column's std: small enough to keep the
+# marginals and churn correlations, large enough that rows are not plain copies.
+JITTER = {"CreditScore": 0.08, "Age": 0.05, "Balance": 0.05, "EstimatedSalary": 0.08}
+LIMITS = {"CreditScore": (350, 850), "Age": (18, 92), "Balance": (0, None), "EstimatedSalary": (10, None)}
+
+
+def generate_customers(source: pd.DataFrame, n_rows: int, seed: int | np.random.SeedSequence = 0, id_start: int = 20_000_000) -> pd.DataFrame:
+    """
+    Smoothed bootstrap of a load_data frame: whole rows are resampled (so categorical mixes and
+    their joint relation to Exited are kept) and the continuous columns get small Gaussian jitter.
+    Zero balances stay zero, as in the source.
+    """
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(source), size=n_rows)
+    out = {}
+    for c in RAW_COLUMNS[2:]:
+        out[c] = source[c].to_numpy()[rows]
+
+    for c, share in JITTER.items():
+        x = out[c].astype(float)
+        x = x + rng.normal(0.0, share * float(source[c].std()), size=n_rows)
+        lo, hi = LIMITS[c]
+        x = np.clip(x, lo, hi)
+        out[c] = x
+
+    out["Balance"] = np.where(source["Balance"].to_numpy()[rows] > 0, np.round(out["Balance"], 2), 0.0)
+    out["EstimatedSalary"] = np.round(out["EstimatedSalary"], 2)
+    out["CreditScore"] = np.round(out["CreditScore"]).astype(int)
+    out["Age"] = np.round(out["Age"]).astype(int)
+
+    surnames = source["Surname"].to_numpy() if "Surname" in source.columns else np.array(["Customer"])
+    out["Surname"] = surnames[rng.integers(0, len(surnames), size=n_rows)]
+    out["CustomerID"] = np.arange(id_start, id_start + n_rows)
+
+    return pd.DataFrame(out)[RAW_COLUMNS]
+
+
+def write_synthetic_csv(
+    source: pd.DataFrame,
+    path: str | Path,
+    n_rows: int,
+    seed: int = 0,
+    chunk_rows: int = 500_000,
+) -> Path:
+    """Write n_rows synthetic customers to CSV in chunks, so 10M-row files never sit in memory at once."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    seeds = np.random.SeedSequence(seed)
+    written = 0
+    with open(path, "w", newline="") as fh:
+        while written < n_rows:
+            size = min(chunk_rows, n_rows - written)
+            chunk = generate_customers(source, size, seed=seeds.spawn(1)[0], id_start=20_000_000 + written)
+            chunk.to_csv(fh, index=False, header=(written == 0))
+            written += size
+    return path
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+Load-test a running scoring_server.py with concurrent single-customer requests.
+
+    python scoring_server.py &
+    python load_test.py --concurrency 64 --requests 5000
+
+Reports p50/p90/p99 latency and throughput; compare different --max-batch / --max-wait-ms server settings.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from helpers_data import get_data_path, load_data
+from helpers_modeling import FEATURES
+
+
+async def client(host: str, port: int, payloads: list[bytes], latencies: list[float], errors: list[str]) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in payloads:
+            req = (
+                "POST /score HTTP/1.1\r\n"
+                f"Host: {host}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n"
+            ).encode("latin-1") + body
+            t0 = time.perf_counter()
+            writer.write(req)
+            await writer.drain()
+
+            status = (await reader.readline()).decode("latin-1")
+            length = 0
+            while True:
+                h = await reader.readline()
+                if h in (b"\r\n", b""):
+                    break
+                k, _, v = h.decode("latin-1").partition(":")
+                if k.strip().lower() == "content-length":
+                    length = int(v)
+            resp = await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t0)
+            if " 200 " not in status:
+                errors.append(resp.decode("utf-8", "replace"))
+    finally:
+        writer.close()
+
+
+async def run(host: str, port: int, concurrency: int, n_requests: int, explain: int, seed: int) -> None:
+    df = load_data(get_data_path())
+    rows = df.sample(n_requests, replace=True, random_state=seed)[FEATURES]
+    payloads = []
+    for rec in rows.to_dict(orient="records"):
+        if explain:
+            rec["explain"] = explain
+        payloads.append(json.dumps(rec, default=float).encode("utf-8"))
+
+    latencies: list[float] = []
+    errors: list[str] = []
+    per_client = np.array_split(np.arange(n_requests), concurrency)
+    t0 = time.perf_counter()
+    await asyncio.gather(*[
+        client(host, port, [payloads[i] for i in idx], latencies, errors)
+        for idx in per_client if len(idx)
+    ])
+    wall = time.perf_counter() - t0
+
+    lat_ms = np.array(latencies) * 1000
+    print(f"requests     {len(lat_ms):,} ({len(errors)} errors) over {concurrency} connections")
+    print(f"throughput   {len(lat_ms) / wall:,.0f} req/s")
+    print(f"latency p50  {np.percentile(lat_ms, 50):.2f} ms")
+    print(f"latency p90  {np.percentile(lat_ms, 90):.2f} ms")
+    print(f"latency p99  {np.percentile(lat_ms, 99):.2f} ms")
+    if errors:
+        print(f"first error  {errors[0]}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--explain", type=int, default=0, help="request top-N SHAP drivers")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    asyncio.run(run(args.host, args.port, args.concurrency, args.requests, args.explain, args.seed))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+Pre-render the dashboard pages for projector / low-power sessions.
+
+    python prerender.py
+
+Runs each page headlessly for the default sidebar state and every preset in presets.json,
+records the KPI cards, metrics and chart JSON it emits, and writes them to
+snapshots/<dataset>_<model>.json. Pages serve these instead of recomputing while
+"Projector mode" is ticked; a new dataset or model version simply misses and renders live.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from helpers_data import get_data_path, load_data
+from helpers_perf import start_capture, stop_capture
+from helpers_snapshots import (
+    SNAPSHOT_DIR,
+    SNAPSHOT_PAGES,
+    dataset_version,
+    filter_key,
+    load_or_train_bundle,
+    load_presets,
+    model_segment_by,
+    snapshot_path,
+)
+
+
+def render_page(script: str, bundle, filters: dict | None, timeout: float) -> list[dict]:
+    at = AppTest.from_file(script, default_timeout=timeout)
+    at.session_state["model_bundle"] = bundle
+    at.session_state["use_snapshots"] = False
+    if filters is not None:
+        at.session_state["filter_geos"] = list(filters["geos"])
+        at.session_state["filter_age"] = tuple(filters["age_range"])
+        at.session_state["filter_products"] = list(filters["products"])
+        at.session_state["filter_active"] = filters["active_member"]
+
+    start_capture()
+    try:
+        at.run()
+    finally:
+        items = stop_capture()
+    if at.exception:
+        raise RuntimeError(f"{script} failed: {at.exception[0].message}")
+    return items
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", nargs="+", default=list(SNAPSHOT_PAGES), choices=list(SNAPSHOT_PAGES))
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds allowed per page run")
+    args = parser.parse_args(argv)
+
+    dataset = dataset_version()
+    bundle = load_or_train_bundle(load_data(get_data_path()), dataset, model_segment_by())
+    model = bundle[4]["version"]
+    presets = load_presets()
+
+    store = {"dataset": dataset, "model": model, "pages": {}}
+    failed = []
+    for page in args.pages:
+        script, has_filters = SNAPSHOT_PAGES[page]
+        states = presets if has_filters else [None]
+        for filters in states:
+            name = filters["name"] if filters else "Default"
+            t0 = time.perf_counter()
+            try:
+                items = render_page(script, bundle, filters, args.timeout)
+            except Exception as exc:
+                # That state simply renders live; keep the rest of the store
+                failed.append(f"{page} / {name}")
+                print(f"{page:<18} {name:<24} SKIPPED: {exc}")
+                continue
+            store["pages"].setdefault(page, {})[filter_key(filters)] = items
+            print(f"{page:<18} {name:<24} {len(items):>3} items  {time.perf_counter() - t0:6.1f}s")
+
+    SNAPSHOT_DIR.mkdir(exist_ok=True)
+    path = snapshot_path(dataset, model)
+    path.write_text(json.dumps(store))
+    print(f"Wrote {path} ({path.stat().st_size / 2**20:.1f} MiB)")
+    if failed:
+        print(f"{len(failed)} page states failed and will render live: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,266 @@
+"""
+Local churn scoring service.
+
+    python scoring_server.py --port 8765 --bundle models/churn_bundle.pkl
+
+POST /score with one customer (JSON object) or {"customers": [...]}; add "explain": 3 for the
+top SHAP drivers. GET /health reports the model AUC and batching stats.
+Concurrent single-customer requests are coalesced into micro-batches before scoring.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from helpers_data import get_data_path, load_data
+from helpers_modeling import SEGMENT_BY, FEATURES, train_model, prepare_features, model_proba, explain_rows, risk_level, save_bundle, load_bundle
+
+
+MAX_BODY_BYTES = 10 * 2**20
+CATEGORICAL_FEATURES = ("Geography", "Gender")
+
+
+def validate_customer(customer) -> dict:
+    """Coerce one customer's features, raising ValueError for anything the model cannot score."""
+    if not isinstance(customer, dict):
+        raise ValueError("expected a customer object or {\"customers\": [...]}")
+    missing = [c for c in FEATURES if c not in customer]
+    if missing:
+        raise ValueError(f"customer missing fields: {missing}")
+    out = dict(customer)
+    for c in FEATURES:
+        if c in CATEGORICAL_FEATURES:
+            if not isinstance(out[c], str):
+                raise ValueError(f"{c} must be a string, got {out[c]!r}")
+            continue
+        try:
+            out[c] = float(out[c])
+        except (TypeError, ValueError):
+            raise ValueError(f"{c} must be numeric, got {out[c]!r}") from None
+        if not np.isfinite(out[c]):
+            raise ValueError(f"{c} must be finite, got {out[c]!r}")
+    return out
+
+
+class MicroBatcher:
+    """Queues single-customer requests and scores them together once max_batch is reached or max_wait passes."""
+
+    def __init__(self, bundle, max_batch: int = 64, max_wait_ms: float = 5.0):
+        self.model, self.scaler, self.feature_cols, self.auc, _, self.explainer = bundle
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.batches = 0
+        self.scored = 0
+
+    async def submit(self, customer: dict, explain: int = 0) -> dict:
+        fut = asyncio.get_running_loop().create_future()
+        await self.queue.put((customer, explain, fut))
+        return await fut
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(items) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            customers = [c for c, _, _ in items]
+            explain = max(e for _, e, _ in items)
+            try:
+                results = await loop.run_in_executor(None, self.score, customers, explain)
+            except Exception as exc:
+                for _, _, fut in items:
+                    if not fut.done():
+                        fut.set_exception(exc)
+                continue
+            for (_, e, fut), res in zip(items, results):
+                if not e:
+                    res.pop("drivers", None)
+                elif "drivers" in res:
+                    res["drivers"] = res["drivers"][:e]
+                if not fut.done():
+                    fut.set_result(res)
+
+    def score(self, customers: list[dict], explain: int = 0) -> list[dict]:
+        """Vectorized scoring path shared by micro-batches and batch requests."""
+        df = pd.DataFrame(customers)
+        missing = [c for c in FEATURES if c not in df.columns]
+        if missing:
+            raise ValueError(f"customers missing fields: {missing}")
+
+        Xs = prepare_features(self.scaler, self.feature_cols, df)
+        proba = model_proba(self.model, Xs, df)
+        self.batches += 1
+        self.scored += len(df)
+
+        results = [{"churn_proba": float(p), "risk": risk_level(float(p))} for p in proba]
+        if explain:
+            sv, _ = explain_rows(self.explainer, Xs, df)
+            names = np.array(self.feature_cols)
+            top = np.argsort(-np.abs(sv), axis=1)[:, :explain]
+            for res, row, idx in zip(results, sv, top):
+                res["drivers"] = [{"feature": str(names[i]), "shap": float(row[i])} for i in idx]
+        if "CustomerID" in df.columns:
+            for res, cid in zip(results, df["CustomerID"].tolist()):
+                res["CustomerID"] = cid
+        return results
+
+
+def validate_explain(value, n_features: int) -> int:
+    """Number of SHAP drivers requested: an integer between 0 and the number of model features."""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"explain must be an integer, got {value!r}")
+    try:
+        n = int(value)
+    except (ValueError, OverflowError):
+        raise ValueError(f"explain must be an integer, got {value!r}") from None
+    if n != float(value) or not 0 <= n <= n_features:
+        raise ValueError(f"explain must be an integer between 0 and {n_features}, got {value!r}")
+    return n
+
+
+async def read_request(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line:
+        return None
+    method, path, _ = line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b"\n", b""):
+            break
+        k, _, v = h.decode("latin-1").partition(":")
+        headers[k.strip().lower()] = v.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_BYTES:
+        raise ValueError("request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+def write_response(writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool) -> None:
+    body = json.dumps(payload).encode("utf-8")
+    reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}.get(status, "OK")
+    head = (
+        f"HTTP/1.1 {status} {reason}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+
+
+def make_handler(batcher: MicroBatcher):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    req = await read_request(reader)
+                except (ValueError, asyncio.IncompleteReadError) as exc:
+                    write_response(writer, 400, {"error": str(exc)}, keep_alive=False)
+                    break
+                if req is None:
+                    break
+                method, path, headers, body = req
+                keep_alive = headers.get("connection", "keep-alive").lower() != "close"
+
+                if method == "GET" and path == "/health":
+                    status, payload = 200, {
+                        "status": "ok",
+                        "auc": batcher.auc,
+                        "batches": batcher.batches,
+                        "scored": batcher.scored,
+                        "mean_batch": batcher.scored / max(batcher.batches, 1),
+                    }
+                elif method == "POST" and path == "/score":
+                    status, payload = await score_request(batcher, body)
+                else:
+                    status, payload = 404, {"error": f"no route for {method} {path}"}
+
+                write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+    return handle
+
+
+async def score_request(batcher: MicroBatcher, body: bytes):
+    try:
+        data = json.loads(body or b"{}")
+        explain = validate_explain(data.pop("explain", 0), len(batcher.feature_cols)) if isinstance(data, dict) else 0
+        if isinstance(data, dict) and "customers" in data:
+            if not isinstance(data["customers"], list):
+                raise ValueError("\"customers\" must be a list of customer objects")
+            # Explicit batches are already vectorized; score them directly
+            customers = [validate_customer(c) for c in data["customers"]]
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(None, batcher.score, customers, explain)
+            return 200, {"results": results}
+        # Validate and coerce before queueing so one bad request cannot fail a shared micro-batch
+        return 200, await batcher.submit(validate_customer(data), explain)
+    except ValueError as exc:
+        return 400, {"error": str(exc)}
+    except Exception as exc:
+        return 500, {"error": str(exc)}
+
+
+def get_bundle(bundle_path: str | None, retrain: bool = False, segment_by: str | None = None):
+    if bundle_path and Path(bundle_path).exists() and not retrain:
+        return load_bundle(bundle_path)
+    print("Training model...")
+    bundle = train_model(load_data(get_data_path()), segment_by=segment_by)
+    if bundle_path:
+        save_bundle(bundle, bundle_path)
+    return bundle
+
+
+async def serve(host: str, port: int, bundle, max_batch: int, max_wait_ms: float) -> None:
+    batcher = MicroBatcher(bundle, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    worker = asyncio.create_task(batcher.run())
+    server = await asyncio.start_server(make_handler(batcher), host, port)
+    print(f"Scoring on http://{host}:{port} (max_batch={max_batch}, max_wait={max_wait_ms}ms)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        worker.cancel()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--bundle", default="models/churn_bundle.pkl", help="trained once and saved here if missing")
+    parser.add_argument("--retrain", action="store_true")
+    parser.add_argument("--segment-by", choices=list(SEGMENT_BY), help="also fit per-segment models when (re)training")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    bundle = get_bundle(args.bundle, args.retrain, args.segment_by)
+    print(f"Model ready in {time.perf_counter() - t0:.1f}s")
+    asyncio.run(serve(args.host, args.port, bundle, args.max_batch, args.max_wait_ms))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file